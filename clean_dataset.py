@@ -7,19 +7,29 @@ This script cleans English-Hindi parallel datasets by:
 - Normalizing whitespace
 - Removing artifacts that could affect LLM training
 
+Entries of JSON datasets are streamed (via ijson) and written out one by
+one, so memory use does not grow with the dataset size.
+
 Usage:
     python clean_dataset.py --input outputs/en_hi_dataset.json --output outputs/cleaned_dataset.json
     python clean_dataset.py --input outputs/en_hi_dataset.csv --output outputs/cleaned_dataset.csv
 """
 
-import json
+import os
 import csv
 import re
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple
 import logging
 
+import ijson
+
+from utils.json_stream import JsonArrayWriter
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +37,78 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Precompiled cleaning patterns (avoids the re module's cache lookup per call)
+# A fragment of 3+ chars repeated 3+ times needs at least 9 characters, so only
+# words that long are handed to _collapse_repetition. OCR repeats are ASCII
+# letters, so an explicit class replaces \w; the Unicode \b still rejects
+# letter runs that are part of a longer word (digits, accents, Devanagari)
+_RE_LONG_WORD = re.compile(r'\b[A-Za-z]{9,}\b')
+# Page artifacts removed outright. New fixed-literal artifacts (headers,
+# footers) belong in this one alternation as re.escape()d branches rather than
+# in extra passes: the engine then finds all of them in a single scan, and
+# clean_text's substring gate needs one more `in` test per literal.
+_RE_REPRINT = re.compile(r'Reprint\s+\d{4}-\d{2,4}')
+_RE_SECTION_NUM = re.compile(r'\s+\d+\.\d+(?:\.\d+)*\s+')
+
+# Translation table mapping newline, carriage return and tab to a space
+_NL_TABLE = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
+
+def _collapse_repetition(match: re.Match) -> str:
+    """
+    Collapse a word made of one fragment (3+ chars) repeated 3+ times.
+    Linear scan replacing the old backreference regex: the shortest fragment
+    wins and matching is case-insensitive, as before.
+    """
+    word = match.group()
+    size = len(word)
+    # ASCII-only, so lowercasing never changes the length
+    folded = word.lower()
+    
+    for n in range(3, size // 3 + 1):
+        if size % n == 0 and folded == folded[:n] * (size // n):
+            # Keep only one instance of the repeated fragment
+            return word[:n]
+    return word
+
+
+# Bound substitution methods used by _clean_text
+_sub_reprint = _RE_REPRINT.sub
+_sub_section_num = _RE_SECTION_NUM.sub
+_sub_long_word = _RE_LONG_WORD.sub
+
+
+def _clean_text(text: str) -> str:
+    """
+    Body of TextCleaner.clean_text. Kept as a plain function calling bound
+    pattern methods so the per-entry hot path skips classmethod binding and
+    attribute lookups.
+    """
+    if not text or not isinstance(text, str):
+        return text
+    
+    # Steps run in the order of the individual TextCleaner methods in
+    # clean_text (repetition before artifacts: collapsing a word can leave
+    # an artifact behind). Newlines and tabs need no pass of their own, the
+    # whitespace step below replaces them. Only words of 9+ characters
+    # reach _collapse_repetition.
+    text = _sub_long_word(_collapse_repetition, text)
+    
+    # The artifact passes are gated by a cheap substring test so that the
+    # common, already clean line never reaches the regex engine
+    if 'Reprint' in text:
+        text = _sub_reprint('', text)
+    
+    # Section numbers always contain a dot
+    if '.' in text:
+        text = _sub_section_num(' ', text)
+    
+    # Anything but single plain spaces: runs of spaces, or newlines, tabs
+    # and other whitespace (all of which str.isprintable rejects)
+    if '  ' in text or not text.isprintable():
+        return ' '.join(text.split())
+    return text.strip()
+
 
 class TextCleaner:
     """Handles all text cleaning operations"""
@@ -34,10 +116,7 @@ class TextCleaner:
     @staticmethod
     def remove_newlines(text: str) -> str:
         """Remove all newline, carriage return, and tab characters"""
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        text = text.replace('\t', ' ')
-        return text
+        return text.translate(_NL_TABLE)
     
     @staticmethod
     def fix_repetitive_patterns(text: str) -> str:
@@ -45,57 +124,84 @@ class TextCleaner:
         Fix repetitive OCR errors like 'UNDERSTUNDERSTUNDERST'
         Detects patterns where a word fragment repeats 3+ times consecutively
         """
-        # Pattern: capture a word/fragment that repeats 3+ times
         # Look for sequences like "UNDERST" repeated multiple times
-        pattern = r'\b(\w{3,}?)(\1{2,})\b'
-        
-        def replace_repetition(match):
-            word_fragment = match.group(1)
-            # Keep only one instance of the repeated fragment
-            return word_fragment
-        
-        text = re.sub(pattern, replace_repetition, text, flags=re.IGNORECASE)
+        text = _RE_LONG_WORD.sub(_collapse_repetition, text)
         return text
     
     @staticmethod
     def normalize_whitespace(text: str) -> str:
         """Normalize multiple spaces to single space and strip"""
-        text = re.sub(r'\s+', ' ', text)
-        text = text.strip()
-        return text
+        # str.split() without arguments splits on any whitespace run and
+        # drops leading/trailing whitespace, so no regex is needed
+        return ' '.join(text.split())
     
     @staticmethod
     def remove_page_artifacts(text: str) -> str:
         """Remove common PDF extraction artifacts"""
         # Remove 'Reprint YYYY-YY' patterns
-        text = re.sub(r'Reprint\s+\d{4}-\d{2,4}', '', text)
+        text = _RE_REPRINT.sub('', text)
         
         # Remove standalone numbers that are likely page numbers or section numbers
         # Only if they're at the start/end or surrounded by spaces
-        text = re.sub(r'\s+\d+\.\d+(\.\d+)*\s+', ' ', text)
+        text = _RE_SECTION_NUM.sub(' ', text)
         
         return text
     
     @classmethod
     def clean_text(cls, text: str) -> str:
         """Apply all cleaning operations to text"""
-        if not text or not isinstance(text, str):
-            return text
-        
-        text = cls.remove_newlines(text)
-        text = cls.fix_repetitive_patterns(text)
-        text = cls.remove_page_artifacts(text)
-        text = cls.normalize_whitespace(text)
-        
-        return text
+        return _clean_text(text)
+
+
+# Entries handed to each worker process per task
+_WORKER_CHUNKSIZE = 1000
+
+# Buffer size for dataset file I/O (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
+
+def _clean_pair(english: str, hindi: str) -> Optional[Tuple[str, str]]:
+    """Clean an English/Hindi pair, or return None if it should be dropped"""
+    cleaned_english = _clean_text(english)
+    cleaned_hindi = _clean_text(hindi)
+    
+    # Skip entries with very short or empty text (likely artifacts);
+    # clean_text already strips, so the lengths can be used as they are
+    if len(cleaned_english) < 10 or len(cleaned_hindi) < 10:
+        return None
+    
+    return cleaned_english, cleaned_hindi
+
+
+def _clean_json_entry(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Clean a JSON dataset entry (module level so worker processes can run it)"""
+    cleaned = _clean_pair(entry.get('english', ''), entry.get('hindi', ''))
+    if cleaned is None:
+        return None
+    
+    # Entries are parsed fresh from the input stream, so they are updated in
+    # place; chunk_id, metadata and key order carry over unchanged
+    entry['english'], entry['hindi'] = cleaned
+    return entry
+
+
+def _clean_csv_row(row: List[str], english_idx: int, hindi_idx: int) -> Optional[List[str]]:
+    """Clean a CSV dataset row (module level so worker processes can run it)"""
+    cleaned = _clean_pair(row[english_idx], row[hindi_idx])
+    if cleaned is None:
+        return None
+    
+    row[english_idx], row[hindi_idx] = cleaned
+    return row
 
 
 class DatasetCleaner:
     """Cleans datasets in JSON or CSV format"""
     
-    def __init__(self, input_path: str, output_path: str):
+    def __init__(self, input_path: str, output_path: str, workers: Optional[int] = None):
         self.input_path = Path(input_path)
         self.output_path = Path(output_path)
+        self.workers = workers or os.cpu_count() or 1
         self.cleaner = TextCleaner()
         self.stats = {
             'total_entries': 0,
@@ -105,97 +211,108 @@ class DatasetCleaner:
             'avg_hindi_length': 0
         }
     
-    def clean_json_dataset(self):
-        """Clean JSON format dataset"""
-        logger.info(f"Reading JSON dataset from: {self.input_path}")
-        
-        with open(self.input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        self.stats['total_entries'] = len(data)
-        cleaned_data = []
+    def _map_entries(self, func: Callable, entries: Iterable) -> Iterator:
+        """
+        Apply func to every entry, preserving order.
+        With more than one worker the entries are cleaned in a process pool,
+        fed one window at a time so a streamed input is never fully loaded.
+        """
+        if self.workers <= 1:
+            yield from map(func, entries)
+            return
         
-        english_lengths = []
-        hindi_lengths = []
+        entries = iter(entries)
+        window_size = self.workers * _WORKER_CHUNKSIZE
         
-        for entry in data:
-            # Clean English and Hindi text
-            cleaned_english = self.cleaner.clean_text(entry.get('english', ''))
-            cleaned_hindi = self.cleaner.clean_text(entry.get('hindi', ''))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = None
+            while True:
+                window = list(islice(entries, window_size))
+                if not window:
+                    break
+                # Submit the next window before draining the previous one
+                # so the workers stay busy while results are written out
+                results = executor.map(func, window, chunksize=_WORKER_CHUNKSIZE)
+                if pending is not None:
+                    yield from pending
+                pending = results
             
-            # Skip entries with very short or empty text (likely artifacts)
-            if len(cleaned_english.strip()) < 10 or len(cleaned_hindi.strip()) < 10:
-                self.stats['empty_entries_removed'] += 1
-                continue
-            
-            # Create cleaned entry
-            cleaned_entry = {
-                'chunk_id': entry.get('chunk_id'),
-                'english': cleaned_english,
-                'hindi': cleaned_hindi,
-                'metadata': entry.get('metadata', {})
-            }
-            
-            cleaned_data.append(cleaned_entry)
-            english_lengths.append(len(cleaned_english))
-            hindi_lengths.append(len(cleaned_hindi))
+            if pending is not None:
+                yield from pending
+    
+    def clean_json_dataset(self):
+        """Clean JSON format dataset (streamed entry by entry)"""
+        logger.info(f"Reading JSON dataset from: {self.input_path}")
+        logger.info(f"Writing cleaned JSON dataset to: {self.output_path}")
         
-        self.stats['cleaned_entries'] = len(cleaned_data)
-        if english_lengths:
-            self.stats['avg_english_length'] = sum(english_lengths) / len(english_lengths)
-        if hindi_lengths:
-            self.stats['avg_hindi_length'] = sum(hindi_lengths) / len(hindi_lengths)
+        # Running totals for the average lengths
+        total_english_length = 0
+        total_hindi_length = 0
         
-        # Save cleaned data
-        logger.info(f"Writing cleaned JSON dataset to: {self.output_path}")
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
+        with open(self.input_path, 'rb') as fin, \
+                open(self.output_path, 'wb') as fout, \
+                JsonArrayWriter(fout) as writer:
+            entries = ijson.items(fin, 'item', use_float=True)
+            for cleaned_entry in self._map_entries(_clean_json_entry, entries):
+                self.stats['total_entries'] += 1
+                
+                if cleaned_entry is None:
+                    self.stats['empty_entries_removed'] += 1
+                    continue
+                
+                # Write it straight away instead of holding the whole dataset
+                writer.write(cleaned_entry)
+                self.stats['cleaned_entries'] += 1
+                total_english_length += len(cleaned_entry['english'])
+                total_hindi_length += len(cleaned_entry['hindi'])
+        
+        self._set_average_lengths(total_english_length, total_hindi_length)
     
     def clean_csv_dataset(self):
-        """Clean CSV format dataset"""
+        """Clean CSV format dataset (streamed row by row)"""
         logger.info(f"Reading CSV dataset from: {self.input_path}")
         
-        with open(self.input_path, 'r', encoding='utf-8', newline='') as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-            fieldnames = reader.fieldnames
+        # Running totals for the average lengths
+        total_english_length = 0
+        total_hindi_length = 0
         
-        self.stats['total_entries'] = len(rows)
-        cleaned_rows = []
-        
-        english_lengths = []
-        hindi_lengths = []
-        
-        for row in rows:
-            # Clean English and Hindi text
-            cleaned_english = self.cleaner.clean_text(row.get('english', ''))
-            cleaned_hindi = self.cleaner.clean_text(row.get('hindi', ''))
+        # Positional rows: only two columns change, so skip building a dict
+        # per row and locate them once from the header
+        with open(self.input_path, 'r', encoding='utf-8', newline='', buffering=_IO_BUFFER_SIZE) as fin:
+            reader = csv.reader(fin)
+            header = next(reader, [])
             
-            # Skip entries with very short or empty text
-            if len(cleaned_english.strip()) < 10 or len(cleaned_hindi.strip()) < 10:
-                self.stats['empty_entries_removed'] += 1
-                continue
+            if 'english' not in header or 'hindi' not in header:
+                raise ValueError("CSV dataset must have 'english' and 'hindi' columns")
+            english_idx = header.index('english')
+            hindi_idx = header.index('hindi')
+            clean_row = partial(_clean_csv_row, english_idx=english_idx, hindi_idx=hindi_idx)
             
-            # Update row with cleaned text
-            row['english'] = cleaned_english
-            row['hindi'] = cleaned_hindi
-            
-            cleaned_rows.append(row)
-            english_lengths.append(len(cleaned_english))
-            hindi_lengths.append(len(cleaned_hindi))
-        
-        self.stats['cleaned_entries'] = len(cleaned_rows)
-        if english_lengths:
-            self.stats['avg_english_length'] = sum(english_lengths) / len(english_lengths)
-        if hindi_lengths:
-            self.stats['avg_hindi_length'] = sum(hindi_lengths) / len(hindi_lengths)
+            logger.info(f"Writing cleaned CSV dataset to: {self.output_path}")
+            with open(self.output_path, 'w', encoding='utf-8', newline='', buffering=_IO_BUFFER_SIZE) as fout:
+                writer = csv.writer(fout)
+                writer.writerow(header)
+                
+                for row in self._map_entries(clean_row, reader):
+                    self.stats['total_entries'] += 1
+                    
+                    if row is None:
+                        self.stats['empty_entries_removed'] += 1
+                        continue
+                    
+                    writer.writerow(row)
+                    self.stats['cleaned_entries'] += 1
+                    total_english_length += len(row[english_idx])
+                    total_hindi_length += len(row[hindi_idx])
         
-        # Save cleaned data
-        logger.info(f"Writing cleaned CSV dataset to: {self.output_path}")
-        with open(self.output_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(cleaned_rows)
+        self._set_average_lengths(total_english_length, total_hindi_length)
+    
+    def _set_average_lengths(self, total_english_length: int, total_hindi_length: int):
+        """Derive average text lengths from running totals over kept entries"""
+        kept = self.stats['cleaned_entries']
+        if kept:
+            self.stats['avg_english_length'] = total_english_length / kept
+            self.stats['avg_hindi_length'] = total_hindi_length / kept
     
     def clean(self):
         """Clean dataset based on file extension"""
@@ -237,6 +354,12 @@ def main():
         required=True,
         help='Output cleaned dataset file'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker processes used for cleaning (default: CPU count, 1 disables multiprocessing)'
+    )
     
     args = parser.parse_args()
     
@@ -246,7 +369,7 @@ def main():
         return
     
     # Clean dataset
-    cleaner = DatasetCleaner(args.input, args.output)
+    cleaner = DatasetCleaner(args.input, args.output, workers=args.workers)
     cleaner.clean()
     
     logger.info(f"✓ Dataset cleaning completed successfully!")
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+import orjson
+
 from utils.config_loader import ConfigLoader
 from utils.logger import setup_logger
 from utils.state_manager import StateManager
@@ -64,7 +66,8 @@ def check_cost_guardrail(
 def run_pipeline(
     config_path: str = "config.yaml",
     source_paths: list = None,
-    force_restart: bool = False
+    force_restart: bool = False,
+    pretty_json: bool = False
 ):
     """Run the complete NICO-Forge pipeline.
     
@@ -72,6 +75,7 @@ def run_pipeline(
         config_path: Path to config file
         source_paths: List of source file/directory paths
         force_restart: If True, clear state and restart from beginning
+        pretty_json: If True, indent the JSON dataset and failure reports
     """
     global logger
     
@@ -130,7 +134,8 @@ def run_pipeline(
             output_path=raw_text_path,
             failed_output=failed_dir / "extraction_failed.json",
             max_file_size_mb=config.get("extraction", "max_file_size_mb", default=100),
-            state_manager=state_manager
+            state_manager=state_manager,
+            workers=config.get("extraction", "workers", default=None)
         )
         
         extraction_stats = extractor.extract_from_sources(source_paths)
@@ -141,6 +146,11 @@ def run_pipeline(
     # ========================================================================
     # STEP 2: CLEANING
     # ========================================================================
+    # When chunking runs right after cleaning, the cleaned lines are streamed
+    # straight into the chunker (STEP 3) while the cleaned text file is
+    # written, instead of being read back from it
+    cleaner = None
+    
     if not state_manager.is_completed("cleaner"):
         logger.info("STEP 2: Cleaning extracted text")
         
@@ -154,8 +164,12 @@ def run_pipeline(
             normalize_whitespace=config.get("cleaning", "normalize_whitespace", default=True)
         )
         
-        cleaning_stats = cleaner.clean(raw_text_path)
-        logger.info(f"Cleaning complete: {cleaning_stats}")
+        if state_manager.is_completed("chunker"):
+            cleaning_stats = cleaner.clean(raw_text_path)
+            logger.info(f"Cleaning complete: {cleaning_stats}")
+            cleaner = None
+        else:
+            logger.info("Cleaned text will be streamed into chunking")
     else:
         logger.info("STEP 2: Skipping cleaning (already completed)")
     
@@ -173,17 +187,26 @@ def run_pipeline(
             fuzzy_matching=config.get("deduplication", "fuzzy_matching", default=False)
         )
         
-        chunking_stats = chunker.chunk(
-            cleaned_text_path,
-            source_file=str(raw_text_path)
-        )
+        if cleaner is not None:
+            # Fused cleaning + chunking; cleaning is only marked as completed
+            # once the chunks manifest has been written
+            chunking_stats = chunker.chunk_stream(
+                cleaner.stream_cleaned_lines(raw_text_path),
+                source_file=str(raw_text_path)
+            )
+            cleaner.save_stream_state()
+            logger.info(f"Cleaning complete: {cleaner.stream_stats}")
+        else:
+            chunking_stats = chunker.chunk(
+                cleaned_text_path,
+                source_file=str(raw_text_path)
+            )
         logger.info(f"Chunking complete: {chunking_stats}")
     else:
         logger.info("STEP 3: Skipping chunking (already completed)")
-        # Load chunks from manifest
-        import json
-        with open(chunks_manifest_path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+        # Load chunks from manifest (written with orjson, read back with it)
+        with open(chunks_manifest_path, 'rb') as f:
+            manifest = orjson.loads(f.read())
         chunking_stats = {
             "total_chunks": manifest["total_chunks"],
             "unique_chunks": manifest["unique_chunks"],
@@ -210,7 +233,10 @@ def run_pipeline(
             qa_min_samples=config.get("qa", "min_samples"),
             devanagari_threshold=config.get("qa", "devanagari_threshold"),
             max_length_ratio=config.get("qa", "max_length_ratio"),
-            min_length_ratio=config.get("qa", "min_length_ratio")
+            min_length_ratio=config.get("qa", "min_length_ratio"),
+            concurrency=config.get("translation", "concurrency", default=8),
+            output_format=config.get("outputs", "format", default=["csv", "json"]),
+            pretty_json=pretty_json
         )
         
         translation_stats = translation.translate_chunks(chunks)
@@ -240,7 +266,6 @@ def run_pipeline(
     logger.info(f"Output JSON: {dataset_json_path}")
     
     # Save metadata
-    import json
     metadata = {
         "pipeline": "NICO-Forge",
         "version": "1.0",
@@ -259,8 +284,8 @@ def run_pipeline(
         }
     }
     
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    with open(metadata_path, 'wb') as f:
+        f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     logger.info(f"Metadata saved: {metadata_path}")
     logger.info("="*60)
@@ -290,13 +315,20 @@ def main():
         help="Clear state and restart from beginning"
     )
     
+    parser.add_argument(
+        "--pretty-json",
+        action="store_true",
+        help="Indent the JSON dataset and failure reports (compact by default)"
+    )
+    
     args = parser.parse_args()
     
     try:
         run_pipeline(
             config_path=args.config,
             source_paths=args.sources,
-            force_restart=args.force_restart
+            force_restart=args.force_restart,
+            pretty_json=args.pretty_json
         )
     except KeyboardInterrupt:
         print("\n\nPipeline interrupted by user")
@@ -15,14 +15,26 @@ Usage:
     python merge_datasets.py --inputs outputs/cleaned_*.json --output outputs/final_merged.json
 """
 
-import json
 import csv
 import argparse
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 import logging
 import glob
 
+import ijson
+
+# Optional: Arrow merges CSV files in multi-threaded C++ record batches
+# (opt-in, see DatasetMerger); the csv module path is used without it
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+from utils.json_stream import JsonArrayWriter
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,14 +42,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Buffer size for dataset file I/O (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
 
 class DatasetMerger:
     """Merges multiple datasets into a single combined dataset"""
     
-    def __init__(self, input_files: List[str], output_file: str, renumber: bool = True):
+    def __init__(
+        self,
+        input_files: List[str],
+        output_file: str,
+        renumber: bool = True,
+        use_arrow: bool = False
+    ):
         self.input_files = [Path(f) for f in input_files]
         self.output_file = Path(output_file)
         self.renumber = renumber
+        # Arrow writes its own CSV dialect (every value quoted, LF line
+        # endings), so it is only used for CSV when asked for
+        self.use_arrow = use_arrow
         self.stats = {
             'files_processed': 0,
             'total_entries': 0,
@@ -46,89 +70,216 @@ class DatasetMerger:
         }
     
     def merge_json_files(self):
-        """Merge multiple JSON files"""
+        """Merge multiple JSON files (streamed entry by entry)"""
         logger.info(f"Merging {len(self.input_files)} JSON files...")
+        logger.info(f"Writing merged dataset to: {self.output_file}")
         
-        merged_data = []
-        chunk_id_counter = 1
-        
-        for file_path in self.input_files:
-            if not file_path.exists():
-                logger.warning(f"File not found: {file_path}, skipping...")
-                continue
-            
-            logger.info(f"Reading: {file_path.name}")
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Track statistics
-            entries_count = len(data)
-            self.stats['entries_per_file'][file_path.name] = entries_count
-            self.stats['files_processed'] += 1
-            
-            # Renumber chunk_ids if requested
-            if self.renumber:
-                for entry in data:
-                    entry['chunk_id'] = chunk_id_counter
-                    chunk_id_counter += 1
+        with open(self.output_file, 'wb', buffering=_IO_BUFFER_SIZE) as out, JsonArrayWriter(out) as writer:
+            for file_path in self.input_files:
+                if not file_path.exists():
+                    logger.warning(f"File not found: {file_path}, skipping...")
+                    continue
+                
+                logger.info(f"Reading: {file_path.name}")
+                
+                written_before = writer.count
+                with open(file_path, 'rb') as f:
+                    entries = ijson.items(f, 'item', use_float=True)
+                    
+                    # Renumber chunk_ids if requested; ids continue from the
+                    # entries already written, so no separate counter is kept
+                    if self.renumber:
+                        for chunk_id, entry in enumerate(entries, written_before + 1):
+                            entry['chunk_id'] = chunk_id
+                            writer.write(entry)
+                    else:
+                        for entry in entries:
+                            writer.write(entry)
+                entries_count = writer.count - written_before
+                
+                # Track statistics
+                self.stats['entries_per_file'][file_path.name] = entries_count
+                self.stats['files_processed'] += 1
             
-            merged_data.extend(data)
+            self.stats['total_entries'] = writer.count
         
-        self.stats['total_entries'] = len(merged_data)
         self.stats['output_format'] = 'JSON'
-        
-        # Save merged dataset
-        logger.info(f"Writing merged dataset to: {self.output_file}")
-        with open(self.output_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_data, f, ensure_ascii=False, indent=2)
     
     def merge_csv_files(self):
-        """Merge multiple CSV files"""
+        """Merge multiple CSV files (streamed row by row)"""
         logger.info(f"Merging {len(self.input_files)} CSV files...")
+        logger.info(f"Writing merged dataset to: {self.output_file}")
         
-        merged_rows = []
-        chunk_id_counter = 1
+        # With use_arrow, files sharing one header go through Arrow;
+        # reordered or missing columns, empty files and rows Arrow cannot
+        # parse (e.g. ragged ones) need the row path
+        if self.use_arrow and pacsv is None:
+            logger.warning("pyarrow is not installed, merging CSV files row by row")
+        elif self.use_arrow:
+            fieldnames = self._common_csv_header()
+            if fieldnames is not None:
+                try:
+                    self._merge_csv_arrow(fieldnames)
+                except pa.ArrowInvalid as e:
+                    logger.warning(f"Arrow could not parse the input, merging row by row: {e}")
+                    self.stats.update(files_processed=0, total_entries=0, entries_per_file={})
+                else:
+                    self.stats['output_format'] = 'CSV'
+                    return
+        
+        rows_written = 0
         fieldnames = None
         
+        # Positional rows (csv.reader/writer) avoid building a dict per row
+        with open(self.output_file, 'w', encoding='utf-8', newline='', buffering=_IO_BUFFER_SIZE) as out:
+            writer = csv.writer(out)
+            
+            for file_path in self.input_files:
+                if not file_path.exists():
+                    logger.warning(f"File not found: {file_path}, skipping...")
+                    continue
+                
+                logger.info(f"Reading: {file_path.name}")
+                
+                written_before = rows_written
+                with open(file_path, 'r', encoding='utf-8', newline='', buffering=_IO_BUFFER_SIZE) as f:
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    # Blank lines hold no row (DictReader skipped them too)
+                    rows = (row for row in reader if row)
+                    
+                    if header is not None:
+                        # Get fieldnames from first file
+                        if fieldnames is None:
+                            fieldnames = header
+                            writer.writerow(fieldnames)
+                        
+                        # Columns of later files are matched by name, as the
+                        # header of the first file defines the output order
+                        if header != fieldnames:
+                            extra = set(header) - set(fieldnames)
+                            if extra:
+                                raise ValueError(f"{file_path.name} has columns not in the first file: {sorted(extra)}")
+                            rows = self._reorder_rows(rows, header, fieldnames)
+                        else:
+                            rows = self._fit_rows(rows, len(fieldnames))
+                        
+                        if self.renumber:
+                            if 'chunk_id' not in fieldnames:
+                                raise ValueError(f"No 'chunk_id' column to renumber in {file_path.name}")
+                            chunk_id_idx = fieldnames.index('chunk_id')
+                        
+                        # rows_written doubles as the chunk_id of the row
+                        # being written; the branch is taken once per file
+                        # rather than once per row
+                        write_row = writer.writerow
+                        if self.renumber:
+                            for rows_written, row in enumerate(rows, rows_written + 1):
+                                row[chunk_id_idx] = str(rows_written)
+                                write_row(row)
+                        else:
+                            for rows_written, row in enumerate(rows, rows_written + 1):
+                                write_row(row)
+                entries_count = rows_written - written_before
+                
+                # Track statistics
+                self.stats['entries_per_file'][file_path.name] = entries_count
+                self.stats['files_processed'] += 1
+                self.stats['total_entries'] += entries_count
+        
+        self.stats['output_format'] = 'CSV'
+    
+    def _common_csv_header(self) -> Optional[List[str]]:
+        """Return the header shared by all existing input CSVs, or None if they differ"""
+        common_header = None
         for file_path in self.input_files:
             if not file_path.exists():
-                logger.warning(f"File not found: {file_path}, skipping...")
                 continue
             
-            logger.info(f"Reading: {file_path.name}")
-            
             with open(file_path, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.DictReader(f)
-                
-                # Get fieldnames from first file
-                if fieldnames is None:
-                    fieldnames = reader.fieldnames
-                
-                rows = list(reader)
-            
-            # Track statistics
-            entries_count = len(rows)
-            self.stats['entries_per_file'][file_path.name] = entries_count
-            self.stats['files_processed'] += 1
+                header = next(csv.reader(f), None)
             
-            # Renumber chunk_ids if requested
-            if self.renumber:
-                for row in rows:
-                    row['chunk_id'] = str(chunk_id_counter)
-                    chunk_id_counter += 1
-            
-            merged_rows.extend(rows)
+            if header is None or (common_header is not None and header != common_header):
+                return None
+            common_header = header
         
-        self.stats['total_entries'] = len(merged_rows)
-        self.stats['output_format'] = 'CSV'
+        return common_header
+    
+    def _merge_csv_arrow(self, fieldnames: List[str]):
+        """Merge CSV files with identical headers as Arrow record batches"""
+        # Every column is read as a string, so values are written back as
+        # they were instead of as inferred numbers or nulls
+        convert_options = pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in fieldnames},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False
+        )
+        parse_options = pacsv.ParseOptions(newlines_in_values=True)
         
-        # Save merged dataset
-        logger.info(f"Writing merged dataset to: {self.output_file}")
-        with open(self.output_file, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(merged_rows)
+        rows_written = 0
+        writer = None
+        
+        try:
+            for file_path in self.input_files:
+                if not file_path.exists():
+                    logger.warning(f"File not found: {file_path}, skipping...")
+                    continue
+                
+                logger.info(f"Reading: {file_path.name}")
+                
+                if self.renumber:
+                    if 'chunk_id' not in fieldnames:
+                        raise ValueError(f"No 'chunk_id' column to renumber in {file_path.name}")
+                    chunk_id_idx = fieldnames.index('chunk_id')
+                
+                written_before = rows_written
+                reader = pacsv.open_csv(
+                    file_path,
+                    parse_options=parse_options,
+                    convert_options=convert_options
+                )
+                if writer is None:
+                    writer = pacsv.CSVWriter(str(self.output_file), reader.schema)
+                
+                for batch in reader:
+                    # Renumber chunk_ids if requested, a whole batch at a time
+                    if self.renumber:
+                        chunk_ids = pa.array(
+                            range(rows_written + 1, rows_written + 1 + batch.num_rows),
+                            type=pa.int64()
+                        ).cast(pa.string())
+                        batch = batch.set_column(chunk_id_idx, 'chunk_id', chunk_ids)
+                    
+                    writer.write_batch(batch)
+                    rows_written += batch.num_rows
+                
+                # Track statistics
+                entries_count = rows_written - written_before
+                self.stats['entries_per_file'][file_path.name] = entries_count
+                self.stats['files_processed'] += 1
+                self.stats['total_entries'] += entries_count
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    @staticmethod
+    def _fit_rows(rows: Iterable[List[str]], width: int) -> Iterator[List[str]]:
+        """Yield rows padded with empty values (or truncated) to the header width"""
+        for row in rows:
+            if len(row) != width:
+                row = row[:width] + [''] * (width - len(row))
+            yield row
+    
+    @staticmethod
+    def _reorder_rows(rows: Iterable[List[str]], header: List[str], fieldnames: List[str]) -> Iterator[List[str]]:
+        """Yield rows rearranged from their own header's order into fieldnames order"""
+        positions = {name: idx for idx, name in enumerate(header)}
+        for row in rows:
+            # Missing columns are left empty
+            yield [
+                row[positions[name]] if name in positions and positions[name] < len(row) else ''
+                for name in fieldnames
+            ]
     
     def merge(self):
         """Merge datasets based on output file extension"""
@@ -136,6 +287,11 @@ class DatasetMerger:
         if not self.input_files:
             raise ValueError("No input files provided")
         
+        # The output is written while the inputs are still being read
+        output_file = self.output_file.resolve()
+        if any(f.resolve() == output_file for f in self.input_files):
+            raise ValueError(f"Output file is also an input: {self.output_file}")
+        
         # Determine format from output file extension
         if self.output_file.suffix == '.json':
             self.merge_json_files()
@@ -174,6 +330,9 @@ Examples:
   
   # Merge CSV files without renumbering
   python merge_datasets.py --inputs file1.csv file2.csv --output merged.csv --no-renumber
+  
+  # Merge large CSV files with pyarrow
+  python merge_datasets.py --inputs outputs/cleaned_*.csv --output merged.csv --arrow
         """
     )
     
@@ -197,6 +356,12 @@ Examples:
         help='Keep original chunk_ids instead of renumbering sequentially'
     )
     
+    parser.add_argument(
+        '--arrow',
+        action='store_true',
+        help='Merge CSV files with pyarrow (faster; quotes every value and uses LF line endings)'
+    )
+    
     args = parser.parse_args()
     
     # Expand wildcards in input files
@@ -221,7 +386,8 @@ Examples:
     merger = DatasetMerger(
         input_files=input_files,
         output_file=args.output,
-        renumber=not args.no_renumber
+        renumber=not args.no_renumber,
+        use_arrow=args.arrow
     )
     merger.merge()
     
@@ -1,18 +1,24 @@
 """Chunking module with deduplication."""
 
-import json
+import os
+import mmap
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any, Set, Optional
-from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Iterator
+
+import orjson
 
 from utils.exceptions import EmptyTextError, InvalidChunkSizeError
+from utils.json_stream import JsonArrayWriter
 from utils.logger import get_logger
 from utils.progress import ProgressBar
 from utils.state_manager import StateManager
 
 logger = get_logger(__name__)
 
+# Buffer size for the chunks manifest (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
 
 class TextChunker:
     """Chunk text into fixed-size segments with deduplication."""
@@ -60,70 +66,179 @@ class TextChunker:
         if not input_path.exists():
             raise FileNotFoundError(f"Input file not found: {input_path}")
         
-        # Read input text
-        with open(input_path, 'r', encoding='utf-8') as f:
-            text = f.read()
+        with open(input_path, 'rb') as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size == 0:
+                raise EmptyTextError("Input text is empty")
+            
+            # Map the file instead of reading it into one big str: lines are
+            # decoded one at a time (a UTF-8 multi-byte sequence never
+            # contains a newline byte) and tokenized through the rolling
+            # chunk buffer, so neither the corpus text nor a list of all its
+            # words is held in memory. Only the words are used, so carriage
+            # returns need no newline translation.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self._build_chunks(
+                    (line.decode('utf-8').split() for line in iter(mm.readline, b'')),
+                    source_file
+                )
+    
+    def chunk_stream(self, lines: Iterable[str], source_file: str = "unknown") -> Dict[str, Any]:
+        """Chunk text streamed line by line.
         
-        if not text.strip():
-            raise EmptyTextError("Input text is empty")
+        Used to feed the chunker straight from the cleaner (see
+        TextCleaner.stream_cleaned_lines) without a cleaned text file in
+        between. Produces the same chunks as chunk() on the joined lines,
+        while only holding one chunk's worth of words at a time.
         
-        # Tokenize into words
-        words = text.split()
-        total_words = len(words)
+        Args:
+            lines: Iterable of cleaned text lines
+            source_file: Original source file name
+            
+        Returns:
+            Dictionary with chunking results
+        """
+        return self._build_chunks((line.split() for line in lines), source_file)
+    
+    def _iter_chunk_words(self, word_lists: Iterable[List[str]]) -> Iterator[List[str]]:
+        """Regroup consecutive word lists into chunk_size-word lists.
         
-        logger.info(f"Chunking {total_words} words into {self.chunk_size}-word segments")
+        Args:
+            word_lists: Lists of words, in text order
+            
+        Yields:
+            Word lists of chunk_size words (the last one may be shorter)
+        """
+        chunk_size = self.chunk_size
+        words = []
+        
+        for line_words in word_lists:
+            words += line_words
+            if len(words) >= chunk_size:
+                full = len(words) - len(words) % chunk_size
+                for i in range(0, full, chunk_size):
+                    yield words[i:i + chunk_size]
+                del words[:full]
+        
+        if words:
+            yield words
+    
+    def _build_chunks(
+        self,
+        word_lists: Iterable[List[str]],
+        source_file: str
+    ) -> Dict[str, Any]:
+        """Chunk, hash and deduplicate words in one pass and save the manifest.
+        
+        Each chunk is written to the manifest as soon as it is built; the
+        summary fields follow the chunks list, since they are only known at
+        the end.
+        
+        Args:
+            word_lists: Lists of words, in text order
+            source_file: Original source file name
+            
+        Returns:
+            Dictionary with chunking results
+        """
+        logger.info(f"Chunking text into {self.chunk_size}-word segments")
         
-        # Create chunks
         chunks = []
-        chunk_id = 0
-        
-        with ProgressBar(
-            total=total_words,
-            desc="Creating chunks",
-            unit="word"
-        ) as pbar:
-            for i in range(0, total_words, self.chunk_size):
-                chunk_words = words[i:i + self.chunk_size]
-                chunk_text = ' '.join(chunk_words)
+        # raw digest -> canonical chunk_id. A Bloom filter in front of this
+        # would not shrink it: every first occurrence still needs its id
+        # stored for later duplicates to point at, and the entries are small
+        # next to the chunk dicts (full text included) kept in `chunks`.
+        hash_to_canonical = {}
+        dedup_map = {}  # duplicate chunk_id -> canonical chunk_id
+        word_idx = 0
+        
+        # Written to a temp file and renamed over the manifest, so a failed
+        # run (empty input included) leaves the previous manifest intact
+        # rather than a truncated one
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(b'{\n"chunks": ')
                 
-                # Calculate chunk hash
-                chunk_hash = self._hash_text(chunk_text)
+                with JsonArrayWriter(f) as writer, ProgressBar(
+                    total=None,
+                    desc="Creating chunks",
+                    unit="word"
+                ) as pbar:
+                    # Deliberately serial: hashing is a small share of this loop
+                    # (SHA-256 of a few hundred bytes runs in C), and shipping
+                    # chunk texts to and from worker processes would cost more
+                    # than it saves. Deduplication also needs chunks in order.
+                    for chunk_id, chunk_words in enumerate(self._iter_chunk_words(word_lists)):
+                        chunk_text = ' '.join(chunk_words)
+                        
+                        # Calculate chunk hash
+                        # Raw digest bytes key the dedup dict; hex is only
+                        # needed for the manifest
+                        chunk_digest = self._hash_digest(chunk_text)
+                        chunk_hash = chunk_digest.hex()
+                        
+                        chunk_data = {
+                            "chunk_id": chunk_id,
+                            "text": chunk_text,
+                            "hash": chunk_hash,
+                            "start_word_idx": word_idx,
+                            "end_word_idx": word_idx + len(chunk_words),
+                            "word_count": len(chunk_words),
+                            "source_file": source_file,
+                        }
+                        
+                        # Deduplication against the chunks seen so far
+                        if self.enable_deduplication:
+                            if chunk_digest not in hash_to_canonical:
+                                # First occurrence - mark as canonical
+                                hash_to_canonical[chunk_digest] = chunk_id
+                                chunk_data["is_canonical"] = True
+                            else:
+                                # Duplicate - mark and map to canonical
+                                canonical_id = hash_to_canonical[chunk_digest]
+                                chunk_data["is_canonical"] = False
+                                chunk_data["canonical_id"] = canonical_id
+                                dedup_map[chunk_id] = canonical_id
+                        
+                        writer.write(chunk_data)
+                        chunks.append(chunk_data)
+                        word_idx += len(chunk_words)
+                        pbar.update(len(chunk_words))
+                    
+                    if not chunks:
+                        raise EmptyTextError("Input text is empty")
+                    
+                    pbar.close(f"Created {len(chunks)} chunks from {word_idx} words")
                 
-                chunk_data = {
-                    "chunk_id": chunk_id,
-                    "text": chunk_text,
-                    "hash": chunk_hash,
-                    "start_word_idx": i,
-                    "end_word_idx": min(i + self.chunk_size, total_words),
-                    "word_count": len(chunk_words),
-                    "source_file": source_file,
-                }
+                duplicate_count = len(dedup_map)
+                unique_count = len(chunks) - duplicate_count
                 
-                chunks.append(chunk_data)
-                chunk_id += 1
-                pbar.update(len(chunk_words))
-            
-            pbar.close(f"Created {len(chunks)} chunks")
-        
-        # Deduplication
-        if self.enable_deduplication:
-            chunks, dedup_map = self._deduplicate(chunks)
-        else:
-            dedup_map = {}
-        
-        # Save manifest
-        manifest = {
-            "total_chunks": len(chunks),
-            "unique_chunks": len([c for c in chunks if c.get("is_canonical", True)]),
-            "duplicate_chunks": len([c for c in chunks if not c.get("is_canonical", True)]),
-            "chunk_size": self.chunk_size,
-            "total_words": total_words,
-            "deduplication_map": dedup_map,
-            "chunks": chunks
-        }
-        
-        with open(self.manifest_path, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+                if self.enable_deduplication:
+                    if duplicate_count > 0:
+                        logger.info(
+                            f"Found {duplicate_count} duplicates ({duplicate_count/len(chunks)*100:.1f}%). "
+                            f"Unique chunks: {unique_count}"
+                        )
+                    else:
+                        logger.info("No duplicates found")
+                
+                summary = {
+                    "total_chunks": len(chunks),
+                    "unique_chunks": unique_count,
+                    "duplicate_chunks": duplicate_count,
+                    "chunk_size": self.chunk_size,
+                    "total_words": word_idx,
+                    "deduplication_map": dedup_map
+                }
+                for key, value in summary.items():
+                    f.write(b',\n"' + key.encode('utf-8') + b'": ')
+                    f.write(orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                f.write(b'\n}\n')
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, self.manifest_path)
         
         logger.info(f"Chunks manifest saved to {self.manifest_path}")
         
@@ -134,14 +249,14 @@ class TextChunker:
                 "completed",
                 {
                     "total_chunks": len(chunks),
-                    "unique_chunks": manifest["unique_chunks"],
-                    "duplicate_chunks": manifest["duplicate_chunks"]
+                    "unique_chunks": unique_count,
+                    "duplicate_chunks": duplicate_count
                 }
             )
         
         return {
             "total_chunks": len(chunks),
-            "unique_chunks": manifest["unique_chunks"],
+            "unique_chunks": unique_count,
             "chunks": chunks,
             "manifest_path": str(self.manifest_path)
         }
@@ -153,48 +268,20 @@ class TextChunker:
             text: Text to hash
             
         Returns:
-            SHA256 hash
+            SHA256 hash truncated to 128 bits (32 hex characters)
         """
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return self._hash_digest(text).hex()
     
-    def _deduplicate(self, chunks: List[Dict[str, Any]]) -> tuple:
-        """Deduplicate chunks based on hash.
+    def _hash_digest(self, text: str) -> bytes:
+        """Create raw hash digest of text for deduplication.
         
         Args:
-            chunks: List of chunk dictionaries
+            text: Text to hash
             
         Returns:
-            Tuple of (deduplicated chunks, dedup map)
+            SHA256 digest truncated to 128 bits (16 bytes)
         """
-        logger.info("Deduplicating chunks...")
-        
-        hash_to_canonical = {}  # hash -> canonical chunk_id
-        dedup_map = {}  # duplicate chunk_id -> canonical chunk_id
-        
-        for chunk in chunks:
-            chunk_hash = chunk["hash"]
-            chunk_id = chunk["chunk_id"]
-            
-            if chunk_hash not in hash_to_canonical:
-                # First occurrence - mark as canonical
-                hash_to_canonical[chunk_hash] = chunk_id
-                chunk["is_canonical"] = True
-            else:
-                # Duplicate - mark and map to canonical
-                canonical_id = hash_to_canonical[chunk_hash]
-                chunk["is_canonical"] = False
-                chunk["canonical_id"] = canonical_id
-                dedup_map[chunk_id] = canonical_id
-        
-        unique_count = len(hash_to_canonical)
-        duplicate_count = len(chunks) - unique_count
-        
-        if duplicate_count > 0:
-            logger.info(
-                f"Found {duplicate_count} duplicates ({duplicate_count/len(chunks)*100:.1f}%). "
-                f"Unique chunks: {unique_count}"
-            )
-        else:
-            logger.info("No duplicates found")
-        
-        return chunks, dedup_map
+        # The hash is only a deduplication key, so 128 bits are plenty at
+        # dataset scale and halve the key size. SHA-256 itself stays: with
+        # SHA-NI it beats BLAKE2b on chunk-sized inputs.
+        return hashlib.sha256(text.encode('utf-8')).digest()[:16]
@@ -2,7 +2,7 @@
 
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from utils.exceptions import EmptyInputError, EncodingError
 from utils.logger import get_logger
@@ -11,6 +11,9 @@ from utils.state_manager import StateManager
 
 logger = get_logger(__name__)
 
+# Buffer size for the raw input and cleaned output files (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
 
 class TextCleaner:
     """Clean and normalize extracted text."""
@@ -55,6 +58,24 @@ class TextCleaner:
             r'\[\d+\]|\(\d+\)|(?:fig\.|figure|table|ref\.)\s*\d+',
             re.IGNORECASE
         )
+        # Patterns applied to every line are compiled once here and called as
+        # methods; module-level re.sub(pattern, ...) would hash the pattern
+        # string and look it up in the re module's cache on each call
+        self.control_char_pattern = re.compile(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]')
+        
+        # Everything _clean_line deletes, as one alternation so each line is
+        # scanned and rebuilt once instead of once per pattern. Branches keep
+        # the order of the former separate passes; the reference pattern's
+        # IGNORECASE is scoped to its own branch.
+        removal_sources = []
+        if self.remove_urls:
+            removal_sources.append(f'(?P<url>{self.url_pattern.pattern})')
+        if self.remove_emails:
+            removal_sources.append(f'(?P<email>{self.email_pattern.pattern})')
+        if self.remove_references:
+            removal_sources.append(f'(?P<ref>(?i:{self.reference_pattern.pattern}))')
+        removal_sources.append(f'(?P<ctrl>{self.control_char_pattern.pattern})')
+        self.removal_pattern = re.compile('|'.join(removal_sources))
         
         # Create output directory
         self.output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -73,89 +94,154 @@ class TextCleaner:
         if not input_path.exists():
             raise FileNotFoundError(f"Input file not found: {input_path}")
         
-        # Read input text
+        # The stream writes the cleaned text file as it goes
+        for _ in self.stream_cleaned_lines(input_path):
+            pass
+        
+        self.save_stream_state()
+        
+        return {
+            "input_length": self.stream_stats["input_length"],
+            "output_length": self.stream_stats["output_length"],
+            "output_path": str(self.output_path)
+        }
+    
+    def stream_cleaned_lines(self, input_path: str) -> Iterator[str]:
+        """Yield cleaned, non-empty lines of the input file.
+        
+        The lines are also written to the cleaned text file (joined with
+        newlines) as they are yielded, so feeding them straight to the
+        chunker leaves the same file behind as clean(). Statistics are kept
+        in stream_stats; call save_stream_state() once the consumer has
+        finished, so that a crash midway does not mark cleaning as completed.
+        
+        Args:
+            input_path: Path to raw text file
+            
+        Yields:
+            Cleaned lines
+        """
+        input_path = Path(input_path)
+        
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file not found: {input_path}")
+        
+        input_length = 0
+        output_length = 0
+        has_input_text = False
+        preview_parts = []
+        preview_length = 0
+        
+        logger.info(f"Cleaning text stream from {input_path}")
+        
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                raw_text = f.read()
+            with open(input_path, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f, open(
+                self.output_path, 'w', encoding='utf-8', newline='\n', buffering=_IO_BUFFER_SIZE
+            ) as out, ProgressBar(
+                total=None,
+                desc="Cleaning lines",
+                unit="line"
+            ) as pbar:
+                for line in f:
+                    input_length += len(line)
+                    if not has_input_text and line.strip():
+                        has_input_text = True
+                    
+                    cleaned_line = self._clean_line(line)
+                    pbar.update()
+                    if not cleaned_line:
+                        continue
+                    
+                    # Lines come out non-empty and with whitespace collapsed,
+                    # so they are written as they are, newline-separated
+                    if output_length:
+                        out.write('\n')
+                        output_length += 1
+                    out.write(cleaned_line)
+                    output_length += len(cleaned_line)
+                    
+                    if self.preview_path and preview_length <= 2000:
+                        preview_parts.append(cleaned_line)
+                        preview_length += len(cleaned_line) + 1
+                    
+                    yield cleaned_line
+                
+                pbar.close("Text cleaning complete")
         except UnicodeDecodeError as e:
             raise EncodingError(f"Failed to read input file: {e}")
         
-        if not raw_text.strip():
+        if not has_input_text:
             raise EmptyInputError("Input text is empty")
         
-        logger.info(f"Cleaning text ({len(raw_text)} characters)")
-        
-        # Clean the text
-        cleaned_text = self._clean_text(raw_text)
+        if self.preview_path:
+            self._write_preview('\n'.join(preview_parts))
         
-        # Write output
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_text)
+        self.stream_stats = {
+            "input_length": input_length,
+            "output_length": output_length
+        }
+    
+    def save_stream_state(self):
+        """Mark cleaning as completed after stream_cleaned_lines was consumed."""
+        self._save_completed_state(
+            self.stream_stats["input_length"],
+            self.stream_stats["output_length"]
+        )
+    
+    def _write_preview(self, cleaned_text: str):
+        """Write the first 2000 characters of cleaned text to the preview file.
         
-        # Write preview if requested
-        if self.preview_path:
-            preview_length = min(2000, len(cleaned_text))
-            with open(self.preview_path, 'w', encoding='utf-8') as f:
-                f.write(cleaned_text[:preview_length])
-            logger.info(f"Preview saved to {self.preview_path}")
+        Args:
+            cleaned_text: Cleaned text (or at least its first 2000 characters)
+        """
+        preview_length = min(2000, len(cleaned_text))
+        with open(self.preview_path, 'w', encoding='utf-8') as f:
+            f.write(cleaned_text[:preview_length])
+        logger.info(f"Preview saved to {self.preview_path}")
+    
+    def _save_completed_state(self, input_length: int, output_length: int):
+        """Record cleaning statistics and mark the cleaner as completed.
         
-        # Update state
+        Args:
+            input_length: Raw text length in characters
+            output_length: Cleaned text length in characters
+        """
         if self.state_manager:
             self.state_manager.save_state(
                 "cleaner",
                 "completed",
                 {
-                    "input_length": len(raw_text),
-                    "output_length": len(cleaned_text),
-                    "reduction_pct": round((1 - len(cleaned_text) / len(raw_text)) * 100, 2)
+                    "input_length": input_length,
+                    "output_length": output_length,
+                    "reduction_pct": round((1 - output_length / input_length) * 100, 2)
                 }
             )
         
-        logger.info(f"✓ Cleaning complete: {len(cleaned_text)} characters ({len(raw_text)} → {len(cleaned_text)})")
-        
-        return {
-            "input_length": len(raw_text),
-            "output_length": len(cleaned_text),
-            "output_path": str(self.output_path)
-        }
+        logger.info(f"✓ Cleaning complete: {output_length} characters ({input_length} → {output_length})")
     
-    def _clean_text(self, text: str) -> str:
-        """Apply cleaning operations to text.
+    @staticmethod
+    def _may_need_removal(line: str) -> bool:
+        """Check whether a line could contain anything removal_pattern matches.
+        
+        Every branch of the pattern needs a literal anchor ('://', '@', a
+        bracket, a reference keyword or a control character), and substring
+        tests for those are far cheaper than running the regex. Non-ASCII
+        lines always take the regex, since case-insensitive matching can
+        pair keywords with non-ASCII letters that lower() would miss.
         
         Args:
-            text: Raw text
+            line: Input line (with or without its line ending)
             
         Returns:
-            Cleaned text
+            False only if the removal pattern cannot match the line
         """
-        lines = text.split('\n')
-        cleaned_lines = []
-        
-        # Process with progress bar
-        with ProgressBar(
-            total=len(lines),
-            desc="Cleaning lines",
-            unit="line"
-        ) as pbar:
-            for line in lines:
-                cleaned_line = self._clean_line(line)
-                if cleaned_line.strip():  # Skip empty lines
-                    cleaned_lines.append(cleaned_line)
-                pbar.update()
-            
-            pbar.close("Text cleaning complete")
-        
-        # Join lines
-        cleaned_text = '\n'.join(cleaned_lines)
-        
-        # Final normalization
-        if self.normalize_whitespace:
-            # Replace multiple spaces with single space
-            cleaned_text = re.sub(r' +', ' ', cleaned_text)
-            # Replace multiple newlines with double newline
-            cleaned_text = re.sub(r'\n{3,}', '\n\n', cleaned_text)
-        
-        return cleaned_text.strip()
+        # The line ending is not printable, but the pattern does not match it
+        if not line.isascii() or not line.rstrip('\r\n').isprintable():
+            return True
+        if '://' in line or '@' in line or '[' in line or '(' in line:
+            return True
+        lowered = line.lower()
+        return 'fig' in lowered or 'table' in lowered or 'ref.' in lowered
     
     def _clean_line(self, line: str) -> str:
         """Clean a single line of text.
@@ -166,22 +252,12 @@ class TextCleaner:
         Returns:
             Cleaned line
         """
-        # Remove URLs
-        if self.remove_urls:
-            line = self.url_pattern.sub('', line)
-        
-        # Remove emails
-        if self.remove_emails:
-            line = self.email_pattern.sub('', line)
-        
-        # Remove references
-        if self.remove_references:
-            line = self.reference_pattern.sub('', line)
-        
-        # Remove unicode garbage (control characters, etc.)
-        line = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', line)
-        
-        # Normalize whitespace within line
-        line = re.sub(r'\s+', ' ', line)
+        # Remove URLs, emails, references (as enabled) and unicode garbage
+        # (control characters, etc.) in a single pass, skipping the regex for
+        # lines that cannot contain a match
+        if self._may_need_removal(line):
+            line = self.removal_pattern.sub('', line)
         
-        return line.strip()
+        # Normalize whitespace within line; str.split() breaks on exactly the
+        # characters \s matches and drops the ends, so this also strips
+        return ' '.join(line.split())
@@ -1,12 +1,26 @@
 """Text extraction module for PDFs, DOCX, and TXT files."""
 
 import os
+import codecs
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, TextIO
 import PyPDF2
 from docx import Document
 
+# Optional: PDFium (pypdfium2) extracts PDF text in C++, far faster than
+# PyPDF2's pure-Python parser; PyPDF2 remains the fallback
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 from utils.exceptions import (
+    ExtractionError,
     UnsupportedFileTypeError,
     PDFReadError,
     EncodingError
@@ -17,6 +31,12 @@ from utils.state_manager import StateManager
 
 logger = get_logger(__name__)
 
+# Block size for streaming TXT sources (1M characters)
+_TXT_BLOCK_SIZE = 1 << 20
+
+# Buffer size for the aggregated output and part files (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
 
 class TextExtractor:
     """Extract text from various document formats."""
@@ -28,20 +48,25 @@ class TextExtractor:
         output_path: str,
         failed_output: str,
         max_file_size_mb: int = 100,
-        state_manager: StateManager = None
+        state_manager: StateManager = None,
+        workers: Optional[int] = None
     ):
         """Initialize text extractor.
         
         Args:
             output_path: Path to save extracted text
             failed_output: Path to save failed files info
-            max_file_size_mb: Max file size for in-memory processing
+            max_file_size_mb: Max file size for in-memory processing (unused:
+                all formats are streamed; kept for config compatibility)
             state_manager: State manager for resume capability
+            workers: Number of extraction processes (default: CPU count;
+                1 extracts in-process, streaming each file to the output)
         """
         self.output_path = Path(output_path)
         self.failed_output = Path(failed_output)
         self.max_file_size_mb = max_file_size_mb
         self.state_manager = state_manager
+        self.workers = workers or os.cpu_count() or 1
         self.failed_files = []
         
         # Create output directory
@@ -74,21 +99,11 @@ class TextExtractor:
             desc="Extracting text",
             unit="file"
         ) as pbar:
-            with open(self.output_path, 'w', encoding='utf-8') as out_file:
-                for file_path in all_files:
-                    try:
-                        text = self._extract_file(file_path)
-                        if text.strip():
-                            out_file.write(text + "\n\n")
-                            extracted_count += 1
-                        pbar.update()
-                    except Exception as e:
-                        logger.warning(f"Failed to extract {file_path}: {e}")
-                        self.failed_files.append({
-                            "file": str(file_path),
-                            "error": str(e)
-                        })
-                        pbar.update()
+            with open(self.output_path, 'w', encoding='utf-8', newline='\n', buffering=_IO_BUFFER_SIZE) as out_file:
+                if self.workers > 1 and len(all_files) > 1:
+                    extracted_count = self._extract_parallel(all_files, out_file, pbar)
+                else:
+                    extracted_count = self._extract_sequential(all_files, out_file, pbar)
             
             pbar.close(f"Extraction complete: {extracted_count}/{len(all_files)} files")
         
@@ -99,11 +114,14 @@ class TextExtractor:
                 json.dump(self.failed_files, f, indent=2, ensure_ascii=False)
             logger.info(f"Failed files saved to {self.failed_output}")
         
+        # Nothing to go on with if every file failed
+        all_failed = len(self.failed_files) == len(all_files)
+        
         # Update state
         if self.state_manager:
             self.state_manager.save_state(
                 "extraction",
-                "completed",
+                "failed" if all_failed else "completed",
                 {
                     "total_files": len(all_files),
                     "extracted": extracted_count,
@@ -111,6 +129,11 @@ class TextExtractor:
                 }
             )
         
+        if all_failed:
+            raise ExtractionError(
+                f"All {len(all_files)} files failed to extract (see {self.failed_output})"
+            )
+        
         return {
             "total_files": len(all_files),
             "extracted": extracted_count,
@@ -118,6 +141,145 @@ class TextExtractor:
             "output_path": str(self.output_path)
         }
     
+    def _extract_sequential(self, all_files: List[Path], out_file: TextIO, pbar: ProgressBar) -> int:
+        """Extract files one by one in this process, streaming their text.
+        
+        Args:
+            all_files: Files to extract
+            out_file: Aggregated output file
+            pbar: Progress bar to advance per file
+            
+        Returns:
+            Number of files that contained text
+        """
+        extracted_count = 0
+        
+        for file_path in all_files:
+            # Text is written as it is extracted; a file that fails
+            # or yields no text is rolled back to this position
+            file_start = out_file.tell()
+            try:
+                if self._write_file_text(file_path, out_file):
+                    extracted_count += 1
+                else:
+                    out_file.seek(file_start)
+                    out_file.truncate()
+            except Exception as e:
+                out_file.seek(file_start)
+                out_file.truncate()
+                self._record_failure(file_path, e)
+            pbar.update()
+        
+        return extracted_count
+    
+    def _extract_parallel(self, all_files: List[Path], out_file: TextIO, pbar: ProgressBar) -> int:
+        """Extract files in worker processes and write their text in order.
+        
+        Only this process writes to the output file. Workers stream each
+        file's text to a temporary part file next to the output, which is
+        then appended to it in the kernel (see _append_part), so document
+        text is never pickled back through the pool. Parts are appended in
+        input order so the aggregated text (and hence chunk ids) does not
+        depend on scheduling; at most two files per worker are in flight, so
+        finished parts cannot pile up behind a slow one.
+        
+        Args:
+            all_files: Files to extract
+            out_file: Aggregated output file
+            pbar: Progress bar to advance per file
+            
+        Returns:
+            Number of files that contained text
+        """
+        extracted_count = 0
+        files = iter(all_files)
+        
+        # Workers get a module-level function and the part file location
+        # only, not the extractor (with its state manager and failure list)
+        part_dir = self.output_path.parent
+        part_prefix = f'.{self.output_path.name}.'
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque(
+                (file_path, executor.submit(_extract_to_part, file_path, part_dir, part_prefix))
+                for file_path in islice(files, self.workers * 2)
+            )
+            
+            try:
+                while pending:
+                    file_path, future = pending.popleft()
+                    
+                    next_path = next(files, None)
+                    if next_path is not None:
+                        pending.append((
+                            next_path,
+                            executor.submit(_extract_to_part, next_path, part_dir, part_prefix)
+                        ))
+                    
+                    try:
+                        part_path = future.result()
+                    except Exception as e:
+                        self._record_failure(file_path, e)
+                    else:
+                        if part_path is not None:
+                            self._append_part(out_file, part_path)
+                            extracted_count += 1
+                    pbar.update()
+            finally:
+                # Drop the parts of files that were never appended
+                for _, future in pending:
+                    try:
+                        part_path = future.result()
+                    except Exception:
+                        continue
+                    if part_path is not None:
+                        part_path.unlink(missing_ok=True)
+        
+        return extracted_count
+    
+    def _append_part(self, out_file: TextIO, part_path: Path):
+        """Append a part file to the output and delete it.
+        
+        Uses os.sendfile where available, so the bytes are copied inside
+        the kernel instead of through Python buffers.
+        
+        Args:
+            out_file: Aggregated output file
+            part_path: Part file written by _extract_to_part()
+        """
+        # Anything buffered must reach the file before writing to its fd
+        out_file.flush()
+        out_fd = out_file.fileno()
+        
+        try:
+            with open(part_path, 'rb') as part_file:
+                if hasattr(os, 'sendfile'):
+                    size = os.fstat(part_file.fileno()).st_size
+                    offset = 0
+                    while offset < size:
+                        sent = os.sendfile(out_fd, part_file.fileno(), offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                else:
+                    shutil.copyfileobj(part_file, out_file.buffer, length=1 << 20)
+                    out_file.buffer.flush()
+        finally:
+            part_path.unlink(missing_ok=True)
+    
+    def _record_failure(self, file_path: Path, error: Exception):
+        """Log a failed file and remember it for the failure report.
+        
+        Args:
+            file_path: Path to file
+            error: Exception raised while extracting it
+        """
+        logger.warning(f"Failed to extract {file_path}: {error}")
+        self.failed_files.append({
+            "file": str(file_path),
+            "error": str(error)
+        })
+    
     def _collect_files(self, source_paths: List[str]) -> List[Path]:
         """Collect all supported files from source paths.
         
@@ -128,6 +290,7 @@ class TextExtractor:
             List of file paths
         """
         files = []
+        extensions = tuple(self.SUPPORTED_FORMATS)
         
         for source in source_paths:
             source_path = Path(source)
@@ -140,99 +303,242 @@ class TextExtractor:
                 if source_path.suffix.lower() in self.SUPPORTED_FORMATS:
                     files.append(source_path)
             elif source_path.is_dir():
-                for ext in self.SUPPORTED_FORMATS:
-                    files.extend(source_path.rglob(f"*{ext}"))
+                # One walk over the tree instead of one rglob per extension;
+                # sorted so the aggregated text comes out in a stable order
+                for root, dirs, names in os.walk(source_path):
+                    dirs.sort()
+                    files.extend(
+                        Path(root) / name
+                        for name in sorted(names)
+                        if name.lower().endswith(extensions)
+                    )
         
         return files
     
-    def _extract_file(self, file_path: Path) -> str:
-        """Extract text from a single file.
+    @classmethod
+    def _write_file_text(cls, file_path: Path, out_file: TextIO) -> bool:
+        """Stream the text of a single file to the output file.
         
         Args:
             file_path: Path to file
+            out_file: Aggregated output file
             
         Returns:
-            Extracted text
+            True if the file contained any text (followed by a blank line)
+        """
+        has_text = False
+        
+        for part in cls._iter_file(file_path):
+            out_file.write(part)
+            if not has_text and part.strip():
+                has_text = True
+        
+        if has_text:
+            out_file.write("\n\n")
+        
+        return has_text
+    
+    @classmethod
+    def _iter_file(cls, file_path: Path) -> Iterator[str]:
+        """Extract text from a single file piece by piece.
+        
+        Args:
+            file_path: Path to file
+            
+        Yields:
+            Consecutive pieces of the extracted text
             
         Raises:
             UnsupportedFileTypeError: If file format not supported
         """
         suffix = file_path.suffix.lower()
         
-        # Check file size
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        use_streaming = file_size_mb > self.max_file_size_mb
-        
         if suffix == '.pdf':
-            return self._extract_pdf(file_path, streaming=use_streaming)
+            return cls._iter_pdf(file_path)
         elif suffix == '.docx':
-            return self._extract_docx(file_path)
+            return cls._iter_docx(file_path)
         elif suffix == '.txt':
-            return self._extract_txt(file_path)
+            return cls._iter_txt(file_path)
         else:
             raise UnsupportedFileTypeError(f"Unsupported format: {suffix}")
     
-    def _extract_pdf(self, file_path: Path, streaming: bool = False) -> str:
-        """Extract text from PDF file.
+    @classmethod
+    def _iter_pdf(cls, file_path: Path) -> Iterator[str]:
+        """Extract text from PDF file page by page.
+        
+        Uses PDFium when pypdfium2 is installed and falls back to PyPDF2
+        otherwise, or when PDFium cannot open the file.
         
         Args:
             file_path: Path to PDF
-            streaming: Whether to use page-by-page streaming
             
         Returns:
-            Extracted text
+            Iterator over page texts (newline-separated)
+        """
+        if pdfium is not None:
+            try:
+                pdf = pdfium.PdfDocument(file_path)
+            except Exception as e:
+                logger.debug(f"PDFium could not open {file_path}, falling back to PyPDF2: {e}")
+            else:
+                return cls._iter_pdf_pdfium(file_path, pdf)
+        
+        return cls._iter_pdf_pypdf2(file_path)
+    
+    @staticmethod
+    def _iter_pdf_pdfium(file_path: Path, pdf: "pdfium.PdfDocument") -> Iterator[str]:
+        """Extract text from an opened PDFium document page by page.
+        
+        Args:
+            file_path: Path to PDF
+            pdf: Document opened with pypdfium2
+            
+        Yields:
+            Page texts (newline-separated)
         """
         try:
-            text_parts = []
+            first_page = True
+            
+            for page_num in range(len(pdf)):
+                try:
+                    page = pdf[page_num]
+                    textpage = page.get_textpage()
+                    # PDFium separates lines with CRLF
+                    text = textpage.get_text_range().replace('\r\n', '\n')
+                    textpage.close()
+                    page.close()
+                except Exception as e:
+                    logger.debug(f"Failed to extract page {page_num} from {file_path}: {e}")
+                    continue
+                
+                if text:
+                    if not first_page:
+                        yield "\n"
+                    yield text
+                    first_page = False
+        finally:
+            pdf.close()
+    
+    @staticmethod
+    def _iter_pdf_pypdf2(file_path: Path) -> Iterator[str]:
+        """Extract text from PDF file page by page with PyPDF2.
+        
+        Args:
+            file_path: Path to PDF
             
+        Yields:
+            Page texts (newline-separated)
+        """
+        try:
             with open(file_path, 'rb') as f:
                 reader = PyPDF2.PdfReader(f)
+                first_page = True
                 
                 for page_num in range(len(reader.pages)):
                     try:
                         page = reader.pages[page_num]
                         text = page.extract_text()
-                        if text:
-                            text_parts.append(text)
                     except Exception as e:
                         logger.debug(f"Failed to extract page {page_num} from {file_path}: {e}")
-            
-            return "\n".join(text_parts)
+                        continue
+                    
+                    if text:
+                        if not first_page:
+                            yield "\n"
+                        yield text
+                        first_page = False
         
         except Exception as e:
             raise PDFReadError(f"Failed to read PDF {file_path}: {e}")
     
-    def _extract_docx(self, file_path: Path) -> str:
-        """Extract text from DOCX file.
+    @staticmethod
+    def _iter_docx(file_path: Path) -> Iterator[str]:
+        """Extract text from DOCX file paragraph by paragraph.
         
         Args:
             file_path: Path to DOCX
             
-        Returns:
-            Extracted text
+        Yields:
+            Paragraph texts (newline-separated)
         """
         try:
             doc = Document(file_path)
-            return "\n".join([para.text for para in doc.paragraphs])
         except Exception as e:
             raise Exception(f"Failed to read DOCX {file_path}: {e}")
+        
+        for i, para in enumerate(doc.paragraphs):
+            if i:
+                yield "\n"
+            yield para.text
     
-    def _extract_txt(self, file_path: Path) -> str:
-        """Extract text from TXT file.
+    @classmethod
+    def _iter_txt(cls, file_path: Path) -> Iterator[str]:
+        """Extract text from TXT file in blocks.
+        
+        Args:
+            file_path: Path to TXT
+            
+        Yields:
+            Blocks of up to _TXT_BLOCK_SIZE characters
+        """
+        encoding = cls._detect_txt_encoding(file_path)
+        
+        # Text mode takes care of newline translation, also across blocks
+        with open(file_path, 'r', encoding=encoding) as f:
+            for block in iter(lambda: f.read(_TXT_BLOCK_SIZE), ''):
+                yield block
+    
+    @staticmethod
+    def _detect_txt_encoding(file_path: Path) -> str:
+        """Find the first candidate encoding that decodes the whole file.
         
         Args:
             file_path: Path to TXT
             
         Returns:
-            Extracted text
+            Encoding name
         """
         encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
         
         for encoding in encodings:
+            # Decode block by block, discarding the text, so validating a
+            # large file does not hold it in memory
+            decoder = codecs.getincrementaldecoder(encoding)()
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
+                with open(file_path, 'rb') as f:
+                    for block in iter(lambda: f.read(_TXT_BLOCK_SIZE), b''):
+                        decoder.decode(block)
+                decoder.decode(b'', final=True)
             except UnicodeDecodeError:
                 continue
+            return encoding
         
         raise EncodingError(f"Could not decode {file_path} with any encoding")
+
+
+def _extract_to_part(file_path: Path, part_dir: Path, part_prefix: str) -> Optional[Path]:
+    """Extract a single file to a temporary part file (run in workers).
+    
+    Args:
+        file_path: Path to file
+        part_dir: Directory for the part file (next to the output)
+        part_prefix: Part file name prefix
+        
+    Returns:
+        Path of the part file, or None if the file contained no text
+    """
+    fd, part_name = tempfile.mkstemp(suffix='.part', prefix=part_prefix, dir=part_dir)
+    part_path = Path(part_name)
+    
+    try:
+        with open(fd, 'w', encoding='utf-8', newline='\n', buffering=_IO_BUFFER_SIZE) as part_file:
+            has_text = TextExtractor._write_file_text(file_path, part_file)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    
+    if not has_text:
+        part_path.unlink(missing_ok=True)
+        return None
+    
+    return part_path
@@ -1,11 +1,14 @@
 """Translation pipeline with QA and error handling."""
 
-import json
 import asyncio
+import math
 import re
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
+import orjson
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -20,12 +23,29 @@ from utils.exceptions import (
     TimeoutError,
     TranslationQualityError
 )
+from utils.dataset_formats import load_dataset, resolve_output_formats, write_parquet_dataset
 from utils.logger import get_logger
+from utils.partial_results import append_partial_results, load_partial_results
 from utils.progress import ProgressBar
+from utils.rate_limiter import AsyncRateLimiter
 from utils.state_manager import StateManager
 
 logger = get_logger(__name__)
 
+# Every Devanagari character (U+0900 to U+097F), and nothing else, starts
+# with one of these two bytes in UTF-8, so bytes.count tallies them in C.
+# Word characters are counted as summed \w run lengths, without a match
+# object or list item per char. \w follows Unicode's letter/digit
+# classes, which no codepoint-range test (NumPy mask or lookup table)
+# reproduces as cheaply.
+_DEVANAGARI_UTF8_PREFIXES = (b'\xe0\xa4', b'\xe0\xa5')
+_WORD_RUN_PATTERN = re.compile(r'\w+')
+
+# Rough token estimate for rate limiting: ~4 characters per input token,
+# with the translation assumed to take as many tokens again
+_CHARS_PER_TOKEN = 4
+_OUTPUT_TOKEN_FACTOR = 1.0
+
 
 class TranslationPipeline:
     """Translation pipeline with retry, QA, and error handling."""
@@ -39,6 +59,7 @@ class TranslationPipeline:
         qc_failed_output: str,
         state_manager: Optional[StateManager] = None,
         batch_size: int = 20,
+        concurrency: int = 2,
         flush_every: int = 5,
         retries: int = 3,
         backoff_base: float = 2.0,
@@ -48,7 +69,11 @@ class TranslationPipeline:
         qa_min_samples: int = 50,
         devanagari_threshold: float = 0.7,
         max_length_ratio: float = 2.0,
-        min_length_ratio: float = 0.5
+        min_length_ratio: float = 0.5,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        output_format: Any = ("csv", "json"),
+        pretty_json: bool = False
     ):
         """Initialize translation pipeline.
         
@@ -60,6 +85,7 @@ class TranslationPipeline:
             qc_failed_output: Path to QC failed translations JSON
             state_manager: State manager for resume
             batch_size: Chunks per batch
+            concurrency: Number of batches translated at once
             flush_every: Flush to disk every N batches
             retries: Number of retries
             backoff_base: Base backoff time
@@ -70,14 +96,28 @@ class TranslationPipeline:
             devanagari_threshold: Min % of Devanagari chars
             max_length_ratio: Max Hindi/English length ratio
             min_length_ratio: Min Hindi/English length ratio
+            requests_per_minute: Provider request limit (None = unlimited)
+            tokens_per_minute: Provider token limit (None = unlimited)
+            output_format: Dataset format(s) to write: "csv", "json",
+                "parquet", a list of them, or "all"
+            pretty_json: Indent the JSON dataset and failure reports
+                (compact by default)
         """
         self.translator = translator
         self.output_csv = Path(output_csv)
         self.output_json = Path(output_json)
+        self.output_parquet = self.output_csv.with_suffix(".parquet")
+        self.output_formats = resolve_output_formats(output_format)
+        self.json_option = orjson.OPT_INDENT_2 if pretty_json else 0
         self.failed_output = Path(failed_output)
         self.qc_failed_output = Path(qc_failed_output)
+        # Translations are appended here as they are flushed, one JSON
+        # object per line, so an interrupted run can be resumed without
+        # losing them
+        self.partial_output = self.output_json.with_suffix(".jsonl")
         self.state_manager = state_manager
         self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
         self.flush_every = flush_every
         self.retries = retries
         self.backoff_base = backoff_base
@@ -89,6 +129,12 @@ class TranslationPipeline:
         self.max_length_ratio = max_length_ratio
         self.min_length_ratio = min_length_ratio
         
+        # Requests are paced to the provider's limits before they are sent;
+        # the tenacity retries below are left for failures that still happen
+        self.rate_limiter = None
+        if requests_per_minute or tokens_per_minute:
+            self.rate_limiter = AsyncRateLimiter(requests_per_minute, tokens_per_minute)
+        
         # Create output directories
         self.output_csv.parent.mkdir(parents=True, exist_ok=True)
         self.failed_output.parent.mkdir(parents=True, exist_ok=True)
@@ -97,6 +143,11 @@ class TranslationPipeline:
         self.translated_pairs = []
         self.failed_chunks = []
         self.qc_failed_chunks = []
+        
+        # Chunk ids finished since the last flush, and how many of
+        # translated_pairs are already in partial_output
+        self._pending_completed_ids = set()
+        self._flushed_count = 0
     
     async def translate_chunks(
         self,
@@ -110,17 +161,6 @@ class TranslationPipeline:
         Returns:
             Dictionary with translation statistics
         """
-        # Filter to only canonical chunks (skip duplicates)
-        canonical_chunks = [
-            c for c in chunks 
-            if c.get("is_canonical", True)
-        ]
-        
-        logger.info(
-            f"Translating {len(canonical_chunks)} canonical chunks "
-            f"(skipping {len(chunks) - len(canonical_chunks)} duplicates)"
-        )
-        
         # Check for resume
         completed_ids = set()
         if self.state_manager:
@@ -128,43 +168,92 @@ class TranslationPipeline:
             if completed_ids:
                 logger.info(f"Resuming: {len(completed_ids)} chunks already translated")
         
-        # Filter out completed chunks
-        chunks_to_translate = [
-            c for c in canonical_chunks 
-            if c["chunk_id"] not in completed_ids
-        ]
+        # Canonical chunks not yet translated, and the duplicates that will
+        # inherit their translations, in one pass over the chunks
+        chunks_to_translate = []
+        duplicate_chunks = []
+        for c in chunks:
+            if not c.get("is_canonical", True):
+                duplicate_chunks.append(c)
+            elif c["chunk_id"] not in completed_ids:
+                chunks_to_translate.append(c)
+        
+        logger.info(
+            f"Translating {len(chunks) - len(duplicate_chunks)} canonical chunks "
+            f"(skipping {len(duplicate_chunks)} duplicates)"
+        )
         
         if not chunks_to_translate:
             logger.info("All chunks already translated")
-            return self._load_existing_results()
-        
-        # Create batches
-        batches = self._create_batches(chunks_to_translate)
-        
-        logger.info(f"Processing {len(batches)} batches")
-        
-        # Process batches
-        with ProgressBar(
-            total=len(batches),
-            desc="Translating batches",
-            unit="batch"
-        ) as pbar:
-            for i, batch in enumerate(batches):
-                await self._process_batch(batch)
-                pbar.update()
+            # A run can stop after its last flush but before the datasets
+            # were saved, so they are rebuilt from the flushed translations
+            self.translated_pairs = load_partial_results(self.partial_output, completed_ids)
+            if not self.translated_pairs:
+                return self._load_existing_results()
+            return self._finish(duplicate_chunks)
+        
+        # Pick up the translations of an interrupted run, or start afresh
+        if completed_ids:
+            self.translated_pairs = load_partial_results(self.partial_output, completed_ids)
+        elif self.partial_output.exists():
+            self.partial_output.unlink()
+        self._flushed_count = len(self.translated_pairs)
+        
+        # Batches are built lazily, as workers become free
+        batches = self._iter_batches(chunks_to_translate)
+        total_batches = math.ceil(len(chunks_to_translate) / self.batch_size)
+        
+        logger.info(f"Processing {total_batches} batches")
+        
+        self._batches_done = 0
+        
+        try:
+            with ProgressBar(
+                total=total_batches,
+                desc="Translating batches",
+                unit="batch"
+            ) as pbar:
+                # Up to `concurrency` workers pull from the shared batch
+                # generator. Results are only appended between awaits on this
+                # one event loop, so the shared lists need no lock.
+                workers = [
+                    asyncio.create_task(self._batch_worker(batches, pbar))
+                    for _ in range(min(self.concurrency, total_batches))
+                ]
                 
-                # Flush to disk periodically
-                if (i + 1) % self.flush_every == 0:
-                    self._flush_to_disk()
-                    logger.debug(f"Flushed after batch {i + 1}")
-            
-            pbar.close("Translation complete")
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    # Stop batches still in flight if we bail out
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                
+                pbar.close("Translation complete")
+        finally:
+            # Final flush, also on errors or interrupts, so chunks that did
+            # finish are not translated again on resume
+            self._flush_to_disk()
+            await self.translator.aclose()
+        
+        return self._finish(duplicate_chunks)
+    
+    def _finish(self, duplicate_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Expand duplicates, run QA, save the outputs and mark completion.
         
-        # Final flush
-        self._flush_to_disk()
+        Args:
+            duplicate_chunks: Duplicate (non-canonical) chunks
+            
+        Returns:
+            Dictionary with translation statistics
+        """
+        # Batches finish out of order; restore chunk order so QA sampling
+        # sees the same pairs as a sequential run
+        self.translated_pairs.sort(key=itemgetter("chunk_id"))
+        self.failed_chunks.sort(key=itemgetter("chunk_id"))
         
         # Expand duplicates
-        self._expand_duplicates(chunks)
+        self._expand_duplicates(duplicate_chunks)
         
         # Run QA sampling
         self._run_qa_sampling()
@@ -192,22 +281,42 @@ class TranslationPipeline:
             "output_json": str(self.output_json)
         }
     
-    def _create_batches(
+    def _iter_batches(
         self,
         chunks: List[Dict[str, Any]]
-    ) -> List[List[Dict[str, Any]]]:
-        """Create batches of chunks.
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield batches of chunks.
         
         Args:
             chunks: List of chunks
             
-        Returns:
-            List of batches
+        Yields:
+            Batches of up to batch_size chunks
+        """
+        it = iter(chunks)
+        while batch := list(islice(it, self.batch_size)):
+            yield batch
+    
+    async def _batch_worker(
+        self,
+        batches: Iterator[List[Dict[str, Any]]],
+        pbar: ProgressBar
+    ):
+        """Process batches from a shared iterator until it is exhausted.
+        
+        Args:
+            batches: Batch iterator shared with the other workers
+            pbar: Progress bar to advance per batch
         """
-        batches = []
-        for i in range(0, len(chunks), self.batch_size):
-            batches.append(chunks[i:i + self.batch_size])
-        return batches
+        for batch in batches:
+            await self._process_batch(batch)
+            pbar.update()
+            self._batches_done += 1
+            
+            # Flush to disk periodically
+            if self._batches_done % self.flush_every == 0:
+                self._flush_to_disk()
+                logger.debug(f"Flushed after batch {self._batches_done}")
     
     async def _process_batch(self, batch: List[Dict[str, Any]]):
         """Process a single batch with retries.
@@ -218,6 +327,10 @@ class TranslationPipeline:
         # Extract texts
         texts = [chunk["text"] for chunk in batch]
         
+        estimated_tokens = int(
+            sum(len(text) // _CHARS_PER_TOKEN for text in texts) * (1 + _OUTPUT_TOKEN_FACTOR)
+        )
+        
         # Translate with retry decorator
         @retry(
             retry=retry_if_exception_type((RateLimitError, APIRequestError, TimeoutError)),
@@ -230,11 +343,21 @@ class TranslationPipeline:
             reraise=True
         )
         async def translate_with_retry():
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(
+                    self.translator.count_requests(texts),
+                    estimated_tokens
+                )
             return await self.translator.translate_batch(texts)
         
         try:
             translations = await translate_with_retry()
             
+            # The whole batch arrives in one response, so model info and
+            # timestamp are shared by its pairs
+            model_info = self.translator.get_model_info()
+            timestamp = datetime.now().isoformat()
+            
             # Store results
             for chunk, translation in zip(batch, translations):
                 if translation:
@@ -246,22 +369,18 @@ class TranslationPipeline:
                             "source_file": chunk.get("source_file"),
                             "start_word_idx": chunk.get("start_word_idx"),
                             "end_word_idx": chunk.get("end_word_idx"),
-                            "translator": self.translator.get_model_info(),
-                            "timestamp": datetime.now().isoformat()
+                            "translator": model_info,
+                            "timestamp": timestamp
                         }
                     })
                     
-                    # Update state
-                    if self.state_manager:
-                        self.state_manager.update_completed_ids(
-                            "pipeline",
-                            {chunk["chunk_id"]}
-                        )
+                    # Recorded in the state file on the next flush
+                    self._pending_completed_ids.add(chunk["chunk_id"])
                 else:
                     self.failed_chunks.append({
                         "chunk_id": chunk["chunk_id"],
                         "text": chunk["text"],
-                        "error": "Empty translation"
+                        "error": "Translation failed"
                     })
         
         except Exception as e:
@@ -274,34 +393,38 @@ class TranslationPipeline:
                     "error": str(e)
                 })
     
-    def _expand_duplicates(self, all_chunks: List[Dict[str, Any]]):
+    def _expand_duplicates(self, duplicates: List[Dict[str, Any]]):
         """Expand translations to duplicate chunks.
         
         Args:
-            all_chunks: All chunks including duplicates
+            duplicates: Duplicate (non-canonical) chunks
         """
-        # Build mapping from chunk_id to translation
+        if not duplicates:
+            return
+        
+        # Build mapping from chunk_id to translation (only needed when
+        # there are duplicates to expand)
         id_to_translation = {
             pair["chunk_id"]: pair 
             for pair in self.translated_pairs
         }
         
-        # Find duplicates and inherit translations
+        # Duplicates inherit their canonical chunk's translation
         duplicates_expanded = 0
-        for chunk in all_chunks:
-            if not chunk.get("is_canonical", True):
-                canonical_id = chunk.get("canonical_id")
-                if canonical_id in id_to_translation:
-                    canonical_pair = id_to_translation[canonical_id]
-                    # Create new pair for duplicate
-                    duplicate_pair = canonical_pair.copy()
-                    duplicate_pair["chunk_id"] = chunk["chunk_id"]
-                    duplicate_pair["metadata"] = canonical_pair["metadata"].copy()
-                    duplicate_pair["metadata"]["is_duplicate"] = True
-                    duplicate_pair["metadata"]["canonical_id"] = canonical_id
-                    
-                    self.translated_pairs.append(duplicate_pair)
-                    duplicates_expanded += 1
+        for chunk in duplicates:
+            canonical_id = chunk.get("canonical_id")
+            canonical_pair = id_to_translation.get(canonical_id)
+            if canonical_pair is not None:
+                self.translated_pairs.append({
+                    **canonical_pair,
+                    "chunk_id": chunk["chunk_id"],
+                    "metadata": {
+                        **canonical_pair["metadata"],
+                        "is_duplicate": True,
+                        "canonical_id": canonical_id
+                    }
+                })
+                duplicates_expanded += 1
         
         if duplicates_expanded > 0:
             logger.info(f"Expanded {duplicates_expanded} duplicate chunks")
@@ -319,9 +442,9 @@ class TranslationPipeline:
         
         logger.info(f"Running QA on {sample_size} samples")
         
-        # Sample evenly across dataset
+        # Sample evenly across dataset, so reruns check the same pairs
         step = max(1, total // sample_size)
-        samples = self.translated_pairs[::step][:sample_size]
+        samples = self.translated_pairs[:step * sample_size:step]
         
         for pair in samples:
             is_valid, issues = self._validate_translation(
@@ -344,8 +467,8 @@ class TranslationPipeline:
             )
             
             # Save QC failures
-            with open(self.qc_failed_output, 'w', encoding='utf-8') as f:
-                json.dump(self.qc_failed_chunks, f, indent=2, ensure_ascii=False)
+            with open(self.qc_failed_output, 'wb') as f:
+                f.write(orjson.dumps(self.qc_failed_chunks, option=self.json_option))
         else:
             logger.info("QA: All samples passed")
     
@@ -378,8 +501,8 @@ class TranslationPipeline:
         if len_ratio < self.min_length_ratio or len_ratio > self.max_length_ratio:
             issues.append(f"suspicious_length_ratio_{len_ratio:.2f}")
         
-        # Check 4: Error markers
-        if "error" in hindi.lower() or "###" in hindi or "[ERROR]" in hindi:
+        # Check 4: Error markers ("[ERROR]" is covered by the lowercased search)
+        if "error" in hindi.lower() or "###" in hindi:
             issues.append("error_in_output")
         
         return len(issues) == 0, issues
@@ -393,12 +516,11 @@ class TranslationPipeline:
         Returns:
             True if valid Hindi
         """
-        # Devanagari Unicode range: U+0900 to U+097F
-        devanagari_pattern = re.compile(r'[\u0900-\u097F]')
-        
-        # Count Devanagari characters
-        devanagari_chars = len(devanagari_pattern.findall(text))
-        total_chars = len(re.findall(r'\w', text))  # Alphanumeric only
+        # Count Devanagari characters (surrogatepass: a stray lone surrogate
+        # in API output must not make the check raise)
+        encoded = text.encode('utf-8', 'surrogatepass')
+        devanagari_chars = sum(map(encoded.count, _DEVANAGARI_UTF8_PREFIXES))
+        total_chars = sum(map(len, _WORD_RUN_PATTERN.findall(text)))  # Alphanumeric only
         
         if total_chars == 0:
             return False
@@ -409,40 +531,59 @@ class TranslationPipeline:
     
     def _flush_to_disk(self):
         """Flush current translations to disk (incremental save)."""
-        # This is a safety measure - actual final save happens in _save_datasets
-        pass
+        # Append only the pairs added since the last flush; the file is
+        # block-buffered and flushed once, on close
+        new_pairs = self.translated_pairs[self._flushed_count:]
+        if new_pairs:
+            append_partial_results(self.partial_output, new_pairs)
+            self._flushed_count = len(self.translated_pairs)
+        
+        # Completed ids are written after their translations, and here
+        # rather than per chunk, as one append per flush
+        if self.state_manager and self._pending_completed_ids:
+            self.state_manager.update_completed_ids("pipeline", self._pending_completed_ids)
+            self._pending_completed_ids = set()
     
     def _save_datasets(self):
-        """Save final CSV and JSON datasets."""
+        """Save final datasets in the configured output formats."""
         # Sort by chunk_id
-        sorted_pairs = sorted(self.translated_pairs, key=lambda x: x["chunk_id"])
+        self.translated_pairs.sort(key=itemgetter("chunk_id"))
         
         # Save CSV
-        import csv
-        with open(self.output_csv, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["chunk_id", "english", "hindi", "source_file"])
+        if "csv" in self.output_formats:
+            import csv
+            with open(self.output_csv, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["chunk_id", "english", "hindi", "source_file"])
+                
+                writer.writerows(
+                    [
+                        pair["chunk_id"],
+                        pair["english"],
+                        pair["hindi"],
+                        pair["metadata"].get("source_file", "")
+                    ]
+                    for pair in self.translated_pairs
+                )
             
-            for pair in sorted_pairs:
-                writer.writerow([
-                    pair["chunk_id"],
-                    pair["english"],
-                    pair["hindi"],
-                    pair["metadata"].get("source_file", "")
-                ])
-        
-        logger.info(f"Saved CSV dataset: {self.output_csv}")
+            logger.info(f"Saved CSV dataset: {self.output_csv}")
         
         # Save JSON
-        with open(self.output_json, 'w', encoding='utf-8') as f:
-            json.dump(sorted_pairs, f, indent=2, ensure_ascii=False)
+        if "json" in self.output_formats:
+            with open(self.output_json, 'wb') as f:
+                f.write(orjson.dumps(self.translated_pairs, option=self.json_option))
+            
+            logger.info(f"Saved JSON dataset: {self.output_json}")
         
-        logger.info(f"Saved JSON dataset: {self.output_json}")
+        # Save Parquet
+        if "parquet" in self.output_formats:
+            write_parquet_dataset(self.translated_pairs, self.output_parquet)
+            logger.info(f"Saved Parquet dataset: {self.output_parquet}")
         
         # Save failed chunks
         if self.failed_chunks:
-            with open(self.failed_output, 'w', encoding='utf-8') as f:
-                json.dump(self.failed_chunks, f, indent=2, ensure_ascii=False)
+            with open(self.failed_output, 'wb') as f:
+                f.write(orjson.dumps(self.failed_chunks, option=self.json_option))
             logger.info(f"Saved failed chunks: {self.failed_output}")
     
     def _load_existing_results(self) -> Dict[str, Any]:
@@ -451,9 +592,15 @@ class TranslationPipeline:
         Returns:
             Statistics dictionary
         """
-        if self.output_json.exists():
-            with open(self.output_json, 'r', encoding='utf-8') as f:
-                self.translated_pairs = json.load(f)
+        # Whichever configured output was saved, not necessarily JSON
+        pairs = load_dataset(
+            self.output_formats,
+            self.output_csv,
+            self.output_json,
+            self.output_parquet
+        )
+        if pairs is not None:
+            self.translated_pairs = pairs
         
         return {
             "total_translated": len(self.translated_pairs),
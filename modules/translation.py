@@ -1,18 +1,29 @@
 """Simple translation module using Google Translate (free)."""
 
-import json
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
+import orjson
 from googletrans import Translator
 
+from utils.dataset_formats import load_dataset, resolve_output_formats, write_parquet_dataset
 from utils.logger import get_logger
+from utils.partial_results import append_partial_results, load_partial_results
 from utils.progress import ProgressBar
 from utils.state_manager import StateManager
 
 logger = get_logger(__name__)
 
+# The Devanagari block (U+0900 to U+097F) is exactly the characters whose
+# UTF-8 encoding starts with one of these byte pairs, so the QA check
+# counts them with bytes.count. Word characters are summed regex runs.
+_DEVANAGARI_UTF8_PREFIXES = (b'\xe0\xa4', b'\xe0\xa5')
+_WORD_RUN_PATTERN = re.compile(r'\w+')
+
 
 class GoogleTranslation:
     """Simple translation using Google Translate API (free, no rate limits)."""
@@ -28,7 +39,11 @@ class GoogleTranslation:
         qa_min_samples: int = 50,
         devanagari_threshold: float = 0.7,
         max_length_ratio: float = 2.0,
-        min_length_ratio: float = 0.5
+        min_length_ratio: float = 0.5,
+        concurrency: int = 8,
+        flush_every: int = 100,
+        output_format: Any = ("csv", "json"),
+        pretty_json: bool = False
     ):
         """Initialize Google translation.
         
@@ -43,29 +58,46 @@ class GoogleTranslation:
             devanagari_threshold: Min % of Devanagari chars
             max_length_ratio: Max Hindi/English length ratio
             min_length_ratio: Min Hindi/English length ratio
+            concurrency: Number of translation requests in flight at once
+            flush_every: Record completed chunk ids in the state every N chunks
+            output_format: Dataset format(s) to write: "csv", "json",
+                "parquet", a list of them, or "all"
+            pretty_json: Indent the JSON dataset and failure reports
+                (compact by default)
         """
         self.output_csv = Path(output_csv)
         self.output_json = Path(output_json)
+        self.output_parquet = self.output_csv.with_suffix(".parquet")
+        self.output_formats = resolve_output_formats(output_format)
+        self.json_option = orjson.OPT_INDENT_2 if pretty_json else 0
         self.failed_output = Path(failed_output)
         self.qc_failed_output = Path(qc_failed_output)
+        # Translations are appended here while translating, so the ones
+        # recorded as completed survive an interrupted run
+        self.partial_output = self.output_json.with_suffix(".jsonl")
         self.state_manager = state_manager
         self.qa_sample_rate = qa_sample_rate
         self.qa_min_samples = qa_min_samples
         self.devanagari_threshold = devanagari_threshold
         self.max_length_ratio = max_length_ratio
         self.min_length_ratio = min_length_ratio
+        self.concurrency = max(1, concurrency)
+        self.flush_every = max(1, flush_every)
         
         # Create output directories
         self.output_csv.parent.mkdir(parents=True, exist_ok=True)
         self.failed_output.parent.mkdir(parents=True, exist_ok=True)
         
-        # Initialize translator
-        self.translator = Translator()
+        # Translators are created per worker thread (see _get_translator)
+        self._local = threading.local()
         
         # Storage
         self.translated_pairs = []
         self.failed_chunks = []
         self.qc_failed_chunks = []
+        
+        # Number of translated_pairs already in partial_output
+        self._flushed_count = 0
     
     def translate_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Translate chunks using Google Translate.
@@ -76,17 +108,6 @@ class GoogleTranslation:
         Returns:
             Dictionary with translation statistics
         """
-        # Filter to only canonical chunks (skip duplicates)
-        canonical_chunks = [
-            c for c in chunks 
-            if c.get("is_canonical", True)
-        ]
-        
-        logger.info(
-            f"Translating {len(canonical_chunks)} canonical chunks "
-            f"(skipping {len(chunks) - len(canonical_chunks)} duplicates)"
-        )
-        
         # Check for resume
         completed_ids = set()
         if self.state_manager:
@@ -94,70 +115,110 @@ class GoogleTranslation:
             if completed_ids:
                 logger.info(f"Resuming: {len(completed_ids)} chunks already translated")
         
-        # Filter out completed chunks
-        chunks_to_translate = [
-            c for c in canonical_chunks 
-            if c["chunk_id"] not in completed_ids
-        ]
+        # Canonical chunks not yet translated, and the duplicates that will
+        # inherit their translations, in one pass over the chunks
+        chunks_to_translate = []
+        duplicate_chunks = []
+        for c in chunks:
+            if not c.get("is_canonical", True):
+                duplicate_chunks.append(c)
+            elif c["chunk_id"] not in completed_ids:
+                chunks_to_translate.append(c)
+        
+        logger.info(
+            f"Translating {len(chunks) - len(duplicate_chunks)} canonical chunks "
+            f"(skipping {len(duplicate_chunks)} duplicates)"
+        )
         
         if not chunks_to_translate:
             logger.info("All chunks already translated")
-            return self._load_existing_results()
+            # A run can stop after its last flush but before the datasets
+            # were saved, so they are rebuilt from the flushed translations
+            self.translated_pairs = load_partial_results(self.partial_output, completed_ids)
+            if not self.translated_pairs:
+                return self._load_existing_results()
+            return self._finish(duplicate_chunks)
         
         logger.info(f"Processing {len(chunks_to_translate)} chunks")
         
-        # Translate chunks with progress bar
+        # Pick up the translations of an interrupted run, or start afresh
+        if completed_ids:
+            self.translated_pairs = load_partial_results(self.partial_output, completed_ids)
+        elif self.partial_output.exists():
+            self.partial_output.unlink()
+        self._flushed_count = len(self.translated_pairs)
+        
+        # Requests are network-bound, so they run in a thread pool;
+        # googletrans 4.0.0-rc1 has no async API. Results are consumed in
+        # chunk order, which keeps the output and QA sampling deterministic.
         with ProgressBar(
             total=len(chunks_to_translate),
             desc="Translating chunks",
             unit="chunk"
         ) as pbar:
-            for chunk in chunks_to_translate:
-                try:
-                    # Translate using Google Translate
-                    translation = self.translator.translate(
-                        chunk["text"],
-                        src='en',
-                        dest='hi'
-                    )
-                    
-                    hindi_text = translation.text
-                    
-                    # Store result
-                    self.translated_pairs.append({
-                        "chunk_id": chunk["chunk_id"],
-                        "english": chunk["text"],
-                        "hindi": hindi_text,
-                        "metadata": {
-                            "source_file": chunk.get("source_file"),
-                            "start_word_idx": chunk.get("start_word_idx"),
-                            "end_word_idx": chunk.get("end_word_idx"),
-                            "translator": "googletrans",
-                            "timestamp": datetime.now().isoformat()
-                        }
-                    })
-                    
-                    # Update state
-                    if self.state_manager:
-                        self.state_manager.update_completed_ids(
-                            "translation",
-                            {chunk["chunk_id"]}
-                        )
-                    
-                except Exception as e:
-                    logger.error(f"Translation failed for chunk {chunk['chunk_id']}: {e}")
-                    self.failed_chunks.append({
-                        "chunk_id": chunk["chunk_id"],
-                        "text": chunk["text"],
-                        "error": str(e)
-                    })
+            executor = ThreadPoolExecutor(max_workers=self.concurrency)
+            # Results are flushed in groups rather than one chunk at a time,
+            # each flush one append to the partial and state files
+            pending_ids = set()
+            try:
+                futures = [
+                    executor.submit(self._translate_text, chunk["text"])
+                    for chunk in chunks_to_translate
+                ]
                 
-                pbar.update()
+                for chunk, future in zip(chunks_to_translate, futures):
+                    try:
+                        hindi_text = future.result()
+                        
+                        # Store result
+                        self.translated_pairs.append({
+                            "chunk_id": chunk["chunk_id"],
+                            "english": chunk["text"],
+                            "hindi": hindi_text,
+                            "metadata": {
+                                "source_file": chunk.get("source_file"),
+                                "start_word_idx": chunk.get("start_word_idx"),
+                                "end_word_idx": chunk.get("end_word_idx"),
+                                "translator": "googletrans",
+                                "timestamp": datetime.now().isoformat()
+                            }
+                        })
+                        
+                        # Update state
+                        pending_ids.add(chunk["chunk_id"])
+                        if len(pending_ids) >= self.flush_every:
+                            self._flush_to_disk(pending_ids)
+                            pending_ids = set()
+                        
+                    except Exception as e:
+                        logger.error(f"Translation failed for chunk {chunk['chunk_id']}: {e}")
+                        self.failed_chunks.append({
+                            "chunk_id": chunk["chunk_id"],
+                            "text": chunk["text"],
+                            "error": str(e)
+                        })
+                    
+                    pbar.update()
+            finally:
+                # Don't start queued requests after an interrupt
+                executor.shutdown(wait=True, cancel_futures=True)
+                self._flush_to_disk(pending_ids)
             
             pbar.close("Translation complete")
         
+        return self._finish(duplicate_chunks)
+    
+    def _finish(self, duplicate_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Expand duplicates, run QA, save the outputs and mark completion.
+        
+        Args:
+            duplicate_chunks: Duplicate (non-canonical) chunks
+            
+        Returns:
+            Dictionary with translation statistics
+        """
         # Expand duplicates
-        self._expand_duplicates(chunks)
+        self._expand_duplicates(duplicate_chunks)
         
         # Run QA sampling
         self._run_qa_sampling()
@@ -167,8 +228,8 @@ class GoogleTranslation:
         
         # Save failed chunks
         if self.failed_chunks:
-            with open(self.failed_output, 'w', encoding='utf-8') as f:
-                json.dump(self.failed_chunks, f, indent=2, ensure_ascii=False)
+            with open(self.failed_output, 'wb') as f:
+                f.write(orjson.dumps(self.failed_chunks, option=self.json_option))
             logger.info(f"Failed chunks saved to {self.failed_output}")
         
         # Update state
@@ -191,30 +252,61 @@ class GoogleTranslation:
             "output_json": str(self.output_json)
         }
     
-    def _expand_duplicates(self, all_chunks: List[Dict[str, Any]]):
-        """Expand translations to duplicate chunks."""
-        # Build mapping from chunk_id to translation
+    def _flush_to_disk(self, chunk_ids: set):
+        """Append new translations to partial_output, then record their ids."""
+        new_pairs = self.translated_pairs[self._flushed_count:]
+        if new_pairs:
+            append_partial_results(self.partial_output, new_pairs)
+            self._flushed_count = len(self.translated_pairs)
+        
+        if self.state_manager and chunk_ids:
+            self.state_manager.update_completed_ids("translation", chunk_ids)
+    
+    def _get_translator(self) -> Translator:
+        """Return the calling thread's translator, creating it on first use."""
+        translator = getattr(self._local, "translator", None)
+        if translator is None:
+            translator = Translator()
+            self._local.translator = translator
+        return translator
+    
+    def _translate_text(self, text: str) -> str:
+        """Translate one text from English to Hindi (run in worker threads)."""
+        translation = self._get_translator().translate(text, src='en', dest='hi')
+        return translation.text
+    
+    def _expand_duplicates(self, duplicates: List[Dict[str, Any]]):
+        """Expand translations to duplicate chunks.
+        
+        Args:
+            duplicates: Duplicate (non-canonical) chunks
+        """
+        if not duplicates:
+            return
+        
+        # Build mapping from chunk_id to translation (only needed when
+        # there are duplicates to expand)
         id_to_translation = {
             pair["chunk_id"]: pair 
             for pair in self.translated_pairs
         }
         
-        # Find duplicates and inherit translations
+        # Duplicates inherit their canonical chunk's translation
         duplicates_expanded = 0
-        for chunk in all_chunks:
-            if not chunk.get("is_canonical", True):
-                canonical_id = chunk.get("canonical_id")
-                if canonical_id in id_to_translation:
-                    canonical_pair = id_to_translation[canonical_id]
-                    # Create new pair for duplicate
-                    duplicate_pair = canonical_pair.copy()
-                    duplicate_pair["chunk_id"] = chunk["chunk_id"]
-                    duplicate_pair["metadata"] = canonical_pair["metadata"].copy()
-                    duplicate_pair["metadata"]["is_duplicate"] = True
-                    duplicate_pair["metadata"]["canonical_id"] = canonical_id
-                    
-                    self.translated_pairs.append(duplicate_pair)
-                    duplicates_expanded += 1
+        for chunk in duplicates:
+            canonical_id = chunk.get("canonical_id")
+            canonical_pair = id_to_translation.get(canonical_id)
+            if canonical_pair is not None:
+                self.translated_pairs.append({
+                    **canonical_pair,
+                    "chunk_id": chunk["chunk_id"],
+                    "metadata": {
+                        **canonical_pair["metadata"],
+                        "is_duplicate": True,
+                        "canonical_id": canonical_id
+                    }
+                })
+                duplicates_expanded += 1
         
         if duplicates_expanded > 0:
             logger.info(f"Expanded {duplicates_expanded} duplicate chunks")
@@ -232,9 +324,9 @@ class GoogleTranslation:
         
         logger.info(f"Running QA on {sample_size} samples")
         
-        # Sample evenly across dataset
+        # Sample evenly across dataset, so reruns check the same pairs
         step = max(1, total // sample_size)
-        samples = self.translated_pairs[::step][:sample_size]
+        samples = self.translated_pairs[:step * sample_size:step]
         
         for pair in samples:
             is_valid, issues = self._validate_translation(
@@ -257,8 +349,8 @@ class GoogleTranslation:
             )
             
             # Save QC failures
-            with open(self.qc_failed_output, 'w', encoding='utf-8') as f:
-                json.dump(self.qc_failed_chunks, f, indent=2, ensure_ascii=False)
+            with open(self.qc_failed_output, 'wb') as f:
+                f.write(orjson.dumps(self.qc_failed_chunks, option=self.json_option))
         else:
             logger.info("QA: All samples passed")
     
@@ -283,12 +375,11 @@ class GoogleTranslation:
     
     def _is_valid_hindi(self, text: str) -> bool:
         """Check if text contains sufficient Devanagari."""
-        # Devanagari Unicode range: U+0900 to U+097F
-        devanagari_pattern = re.compile(r'[\u0900-\u097F]')
-        
-        # Count Devanagari characters
-        devanagari_chars = len(devanagari_pattern.findall(text))
-        total_chars = len(re.findall(r'\w', text))
+        # Count Devanagari characters (surrogatepass: a stray lone surrogate
+        # in API output must not make the check raise)
+        encoded = text.encode('utf-8', 'surrogatepass')
+        devanagari_chars = sum(map(encoded.count, _DEVANAGARI_UTF8_PREFIXES))
+        total_chars = sum(map(len, _WORD_RUN_PATTERN.findall(text)))
         
         if total_chars == 0:
             return False
@@ -298,37 +389,52 @@ class GoogleTranslation:
         return devanagari_ratio >= self.devanagari_threshold
     
     def _save_datasets(self):
-        """Save final CSV and JSON datasets."""
+        """Save final datasets in the configured output formats."""
         # Sort by chunk_id
-        sorted_pairs = sorted(self.translated_pairs, key=lambda x: x["chunk_id"])
+        self.translated_pairs.sort(key=itemgetter("chunk_id"))
         
         # Save CSV
-        import csv
-        with open(self.output_csv, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["chunk_id", "english", "hindi", "source_file"])
+        if "csv" in self.output_formats:
+            import csv
+            with open(self.output_csv, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["chunk_id", "english", "hindi", "source_file"])
+                
+                writer.writerows(
+                    [
+                        pair["chunk_id"],
+                        pair["english"],
+                        pair["hindi"],
+                        pair["metadata"].get("source_file", "")
+                    ]
+                    for pair in self.translated_pairs
+                )
             
-            for pair in sorted_pairs:
-                writer.writerow([
-                    pair["chunk_id"],
-                    pair["english"],
-                    pair["hindi"],
-                    pair["metadata"].get("source_file", "")
-                ])
-        
-        logger.info(f"Saved CSV dataset: {self.output_csv}")
+            logger.info(f"Saved CSV dataset: {self.output_csv}")
         
         # Save JSON
-        with open(self.output_json, 'w', encoding='utf-8') as f:
-            json.dump(sorted_pairs, f, indent=2, ensure_ascii=False)
+        if "json" in self.output_formats:
+            with open(self.output_json, 'wb') as f:
+                f.write(orjson.dumps(self.translated_pairs, option=self.json_option))
+            
+            logger.info(f"Saved JSON dataset: {self.output_json}")
         
-        logger.info(f"Saved JSON dataset: {self.output_json}")
+        # Save Parquet
+        if "parquet" in self.output_formats:
+            write_parquet_dataset(self.translated_pairs, self.output_parquet)
+            logger.info(f"Saved Parquet dataset: {self.output_parquet}")
     
     def _load_existing_results(self) -> Dict[str, Any]:
         """Load existing results when resuming completed translation."""
-        if self.output_json.exists():
-            with open(self.output_json, 'r', encoding='utf-8') as f:
-                self.translated_pairs = json.load(f)
+        # Whichever configured output was saved, not necessarily JSON
+        pairs = load_dataset(
+            self.output_formats,
+            self.output_csv,
+            self.output_json,
+            self.output_parquet
+        )
+        if pairs is not None:
+            self.translated_pairs = pairs
         
         return {
             "total_translated": len(self.translated_pairs),
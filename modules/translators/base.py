@@ -1,11 +1,17 @@
 """Base translator interface."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class BaseTranslator(ABC):
-    """Abstract base class for translation adapters."""
+    """Abstract base class for translation adapters.
+    
+    Adapters are async context managers, closing their resources on exit:
+    
+        async with OpenRouterTranslator() as translator:
+            translations = await translator.translate_batch(chunks)
+    """
     
     @abstractmethod
     async def translate_batch(
@@ -13,7 +19,7 @@ class BaseTranslator(ABC):
         chunks: List[str],
         source_lang: str = "en",
         target_lang: str = "hi"
-    ) -> List[str]:
+    ) -> List[Optional[str]]:
         """Translate a batch of text chunks.
         
         Args:
@@ -22,7 +28,8 @@ class BaseTranslator(ABC):
             target_lang: Target language code
             
         Returns:
-            List of translated chunks
+            List of translated chunks, in order (None for chunks that could
+            not be translated)
         """
         pass
     
@@ -47,6 +54,34 @@ class BaseTranslator(ABC):
         """
         pass
     
+    def count_requests(self, chunks: List[str]) -> int:
+        """Number of API requests translate_batch makes for these chunks.
+        
+        Used for rate limiting. Adapters that pack several chunks into one
+        request override it.
+        
+        Args:
+            chunks: List of text chunks
+            
+        Returns:
+            Request count
+        """
+        return len(chunks)
+    
+    async def aclose(self):
+        """Release resources held between batches, such as HTTP connections.
+        
+        Called by TranslationPipeline when translation finishes. Adapters
+        without such resources need not override it.
+        """
+        pass
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+    
     def _build_prompt(self, text: str, custom_prompt: str = None) -> str:
         """Build translation prompt.
         
@@ -69,3 +104,24 @@ English text:
 {text}
 
 Hindi translation:"""
+    
+    def _build_batch_prompt(self, texts: List[str]) -> str:
+        """Build a prompt translating several texts as numbered segments.
+        
+        Args:
+            texts: Texts to translate (single-line, as chunks are)
+            
+        Returns:
+            Formatted prompt
+        """
+        segments = "\n".join(f"[{i}] {text}" for i, text in enumerate(texts, 1))
+        
+        return f"""Translate each numbered English segment below to Hindi.
+Maintain the tone, style, and meaning accurately.
+Return exactly {len(texts)} lines, each starting with the [number] of its segment.
+Output ONLY the numbered Hindi translations, no explanations.
+
+English segments:
+{segments}
+
+Hindi translations:"""
@@ -1,9 +1,19 @@
 """OpenRouter translator adapter."""
 
 import os
+import re
+import time
 import aiohttp
 import asyncio
-from typing import List, Dict, Any
+from functools import partial
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Callable, Awaitable
+from tenacity import (
+    AsyncRetrying,
+    stop_after_attempt,
+    wait_random_exponential,
+    retry_if_exception_type
+)
 
 from modules.translators.base import BaseTranslator
 from utils.exceptions import (
@@ -16,9 +26,76 @@ from utils.exceptions import (
     EmptyResponseError
 )
 from utils.logger import get_logger
+from utils.rate_limiter import AsyncRateLimiter
+from utils.translation_memory import TranslationMemory
 
 logger = get_logger(__name__)
 
+# "[n]" marker opening each segment of a batched response
+_SEGMENT_MARKER_PATTERN = re.compile(r'^[ \t]*\[(\d+)\][ \t]*', re.MULTILINE)
+
+# Pause after a 429 that does not say how long to wait (seconds)
+_DEFAULT_RATE_LIMIT_PAUSE = 10.0
+
+# Connection pool shared by the translators on an event loop, so running
+# several of them (e.g. to compare models) does not open a pool each. It is
+# closed when the last translator using it is closed.
+_shared_connector: Optional[aiohttp.TCPConnector] = None
+_shared_connector_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_connector_users = 0
+
+
+def _acquire_connector(limit: int) -> aiohttp.TCPConnector:
+    """Get the shared connection pool, creating it if needed.
+    
+    Args:
+        limit: Max connections, if the pool has to be created
+        
+    Returns:
+        Connector for the running event loop
+    """
+    global _shared_connector, _shared_connector_loop, _shared_connector_users
+    
+    # A connector belongs to the loop it was created on; asyncio.run()
+    # starts a new loop each time
+    loop = asyncio.get_running_loop()
+    if (
+        _shared_connector is None
+        or _shared_connector.closed
+        or _shared_connector_loop is not loop
+    ):
+        _shared_connector = aiohttp.TCPConnector(
+            limit=limit,
+            limit_per_host=limit,
+            # One API host: resolve it rarely, and keep idle connections
+            # open across request_delay gaps
+            ttl_dns_cache=600,
+            keepalive_timeout=75
+        )
+        _shared_connector_loop = loop
+        _shared_connector_users = 0
+    
+    _shared_connector_users += 1
+    return _shared_connector
+
+
+async def _release_connector(connector: aiohttp.TCPConnector):
+    """Give back the shared connection pool, closing it after its last user.
+    
+    Args:
+        connector: Connector returned by _acquire_connector()
+    """
+    global _shared_connector, _shared_connector_users
+    
+    # Pools replaced since (after a loop change) are left to their loop
+    if connector is not _shared_connector:
+        return
+    
+    _shared_connector_users -= 1
+    if _shared_connector_users <= 0:
+        _shared_connector = None
+        await connector.close()
+
 
 class OpenRouterTranslator(BaseTranslator):
     """OpenRouter API translator adapter."""
@@ -30,7 +107,15 @@ class OpenRouterTranslator(BaseTranslator):
         model: str = "google/gemini-2.0-flash-thinking-exp:free",
         timeout: int = 30,
         custom_prompt: str = None,
-        request_delay: float = 0
+        request_delay: float = 0,
+        max_connections: int = 64,
+        chunks_per_request: int = 1,
+        request_char_limit: int = 8000,
+        concurrency: int = 1,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        max_backoff: float = 60,
+        cache_path: Optional[str] = None
     ):
         """Initialize OpenRouter translator.
         
@@ -40,7 +125,21 @@ class OpenRouterTranslator(BaseTranslator):
             model: Model name
             timeout: Request timeout in seconds
             custom_prompt: Custom prompt template
-            request_delay: Delay in seconds between requests (for rate limiting)
+            request_delay: Fixed delay in seconds between request starts
+                (prefer requests_per_minute, which allows bursts)
+            max_connections: Size of the keep-alive connection pool shared by
+                all translators (set by the first one to open it)
+            chunks_per_request: Max chunks packed into one prompt (ignored
+                with a custom prompt, which is written for a single text)
+            request_char_limit: Max characters of chunk text per request
+            concurrency: Max requests of one batch in flight at once
+            requests_per_minute: Provider request limit (None = unlimited)
+            max_retries: Attempts per request on rate limits, server errors,
+                timeouts and connection errors
+            max_backoff: Upper bound in seconds of the wait between attempts
+            cache_path: Translation memory database; chunks translated
+                before with the same model and prompt skip the API
+                (None = disabled)
         """
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
@@ -53,13 +152,32 @@ class OpenRouterTranslator(BaseTranslator):
         self.timeout = timeout
         self.custom_prompt = custom_prompt
         self.request_delay = request_delay
+        self.max_connections = max_connections
+        self.chunks_per_request = 1 if custom_prompt else max(1, chunks_per_request)
+        self.request_char_limit = request_char_limit
+        self.concurrency = max(1, concurrency)
+        
+        # Every request, fallbacks included, takes a token; rate-limit
+        # responses from the provider pause it (see _update_rate_limit)
+        self.rate_limiter = AsyncRateLimiter(requests_per_minute=requests_per_minute)
+        self.max_retries = max(1, max_retries)
+        self.max_backoff = max_backoff
+        self.translation_memory = TranslationMemory(cache_path) if cache_path else None
+        
+        # (chunk, last error) for chunks that failed their retry pass too
+        self.dead_letter: List[Tuple[str, Exception]] = []
+        
+        # Shared across batches so connections (and their TLS sessions) are
+        # reused; created on first use, inside the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
     
     async def translate_batch(
         self,
         chunks: List[str],
         source_lang: str = "en",
         target_lang: str = "hi"
-    ) -> List[str]:
+    ) -> List[Optional[str]]:
         """Translate a batch of chunks using OpenRouter API.
         
         Args:
@@ -68,28 +186,254 @@ class OpenRouterTranslator(BaseTranslator):
             target_lang: Target language
             
         Returns:
-            List of translated chunks
+            List of translated chunks (None for failed ones, which are
+            added to dead_letter)
         """
         if not chunks:
             return []
         
-        # Create session
-        async with aiohttp.ClientSession() as session:
-            translations = []
+        if self.translation_memory is None:
+            return await self._translate_chunks(chunks)
+        
+        # Serve chunks translated before from the translation memory and
+        # only send the rest
+        keys = [
+            self.translation_memory.make_key(
+                chunk, self.model, self.custom_prompt or "", source_lang, target_lang
+            )
+            for chunk in chunks
+        ]
+        translations = self.translation_memory.get_many(keys)
+        misses = [i for i, key in enumerate(keys) if key not in translations]
+        
+        if misses:
+            if len(misses) < len(chunks):
+                logger.debug("Translation memory hits: %d/%d", len(chunks) - len(misses), len(chunks))
             
-            # Process one at a time with delay to respect rate limits
-            for i, chunk in enumerate(chunks):
-                if i > 0 and self.request_delay > 0:
-                    await asyncio.sleep(self.request_delay)
-                
-                try:
-                    result = await self._translate_single(session, chunk)
-                    translations.append(result)
-                except Exception as e:
-                    logger.error(f"Translation failed for chunk {i}: {e}")
-                    translations.append("")  # Empty translation on failure
+            new_translations = await self._translate_chunks([chunks[i] for i in misses])
+            
+            # Failed translations are not remembered
+            new_items = [
+                (keys[i], translation)
+                for i, translation in zip(misses, new_translations)
+                if translation is not None
+            ]
+            self.translation_memory.put_many(new_items)
+            translations.update(new_items)
+        
+        return [translations.get(key) for key in keys]
+    
+    async def _translate_chunks(self, chunks: List[str]) -> List[Optional[str]]:
+        """Translate chunks through the API.
+        
+        Chunks are packed into as few requests as the limits allow. Chunks
+        whose request failed, or whose batched response did not match its
+        segments, then get one more pass of single-chunk requests at half
+        the concurrency; those still failing go to dead_letter.
+        
+        Args:
+            chunks: List of text chunks
             
+        Returns:
+            List of translated chunks (None for failed ones)
+        """
+        session = self._get_session()
+        groups = list(self._group_chunks(chunks))
+        
+        results = await self._gather_spaced(
+            [
+                partial(self._translate_group, session, group)
+                if len(group) > 1
+                else partial(self._translate_single, session, group[0])
+                for group in groups
+            ],
+            self.concurrency
+        )
+        
+        translations: List[Optional[str]] = []
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                first = len(translations)
+                if len(group) > 1:
+                    logger.warning(
+                        "Translation failed for chunks %d-%d: %s", first, first + len(group) - 1, result
+                    )
+                else:
+                    logger.warning("Translation failed for chunk %d: %s", first, result)
+                translations.extend([None] * len(group))
+            elif len(group) > 1:
+                translations.extend(result)
+            else:
+                translations.append(result)
+        
+        failed = [i for i, translation in enumerate(translations) if translation is None]
+        if not failed:
             return translations
+        
+        logger.info("Retrying %d failed chunks one by one", len(failed))
+        retried = await self._gather_spaced(
+            [partial(self._translate_single, session, chunks[i]) for i in failed],
+            max(1, self.concurrency // 2)
+        )
+        for i, result in zip(failed, retried):
+            if isinstance(result, Exception):
+                logger.error("Translation failed for chunk %d: %s", i, result)
+                self.dead_letter.append((chunks[i], result))
+            else:
+                translations[i] = result
+        
+        return translations
+    
+    async def _gather_spaced(
+        self,
+        calls: List[Callable[[], Awaitable[Any]]],
+        concurrency: int
+    ) -> List[Any]:
+        """Run request calls concurrently, keeping their order.
+        
+        Request starts stay request_delay apart, so the request rate is what
+        it was with one request at a time; up to `concurrency` requests may
+        be waiting on responses meanwhile.
+        
+        Args:
+            calls: Functions starting one request each
+            concurrency: Max requests in flight at once
+            
+        Returns:
+            Each call's result, or the exception it raised
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        
+        async def run(i: int, call: Callable[[], Awaitable[Any]]) -> Any:
+            if self.request_delay > 0:
+                await asyncio.sleep(max(0.0, start + i * self.request_delay - loop.time()))
+            
+            async with semaphore:
+                return await call()
+        
+        # A failed request does not cancel the others
+        return await asyncio.gather(
+            *(run(i, call) for i, call in enumerate(calls)),
+            return_exceptions=True
+        )
+    
+    def count_requests(self, chunks: List[str]) -> int:
+        """Number of API requests translate_batch makes for these chunks.
+        
+        Args:
+            chunks: List of text chunks
+            
+        Returns:
+            Request count (more if failed chunks have to be retried)
+        """
+        return sum(1 for _ in self._group_chunks(chunks))
+    
+    def _group_chunks(self, chunks: List[str]) -> Iterator[List[str]]:
+        """Split chunks into groups that each fit in one request.
+        
+        Args:
+            chunks: List of text chunks
+            
+        Yields:
+            Consecutive chunks, at most chunks_per_request of them and at
+            most request_char_limit characters (a longer chunk goes alone)
+        """
+        group = []
+        group_chars = 0
+        for chunk in chunks:
+            if group and (
+                len(group) == self.chunks_per_request
+                or group_chars + len(chunk) > self.request_char_limit
+            ):
+                yield group
+                group = []
+                group_chars = 0
+            group.append(chunk)
+            group_chars += len(chunk)
+        
+        if group:
+            yield group
+    
+    async def _translate_group(
+        self,
+        session: aiohttp.ClientSession,
+        texts: List[str]
+    ) -> List[str]:
+        """Translate several chunks with one numbered-segment prompt.
+        
+        Args:
+            session: aiohttp session
+            texts: Texts to translate
+            
+        Returns:
+            Translated texts, in order
+            
+        Raises:
+            ParseError: If the response does not hold exactly one segment
+                per chunk
+        """
+        response = await self._request(session, self._build_batch_prompt(texts))
+        
+        translations = self._parse_batch_response(response, len(texts))
+        if translations is None:
+            raise ParseError(f"Batched response did not match its {len(texts)} segments")
+        return translations
+    
+    @staticmethod
+    def _parse_batch_response(response: str, count: int) -> Optional[List[str]]:
+        """Split a batched response into its numbered segments.
+        
+        Args:
+            response: Model output for a batched prompt
+            count: Number of segments that were sent
+            
+        Returns:
+            Segment translations in order, or None unless segments 1..count
+            each appear exactly once and are non-empty
+        """
+        # split() alternates marker numbers and the text that follows them
+        parts = _SEGMENT_MARKER_PATTERN.split(response)
+        segments = {}
+        for number, segment in zip(parts[1::2], parts[2::2]):
+            number = int(number)
+            segment = segment.strip()
+            if number in segments or not segment:
+                return None
+            segments[number] = segment
+        
+        if segments.keys() != set(range(1, count + 1)):
+            return None
+        
+        return [segments[number] for number in range(1, count + 1)]
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it if needed.
+        
+        Returns:
+            aiohttp session on the shared keep-alive connection pool
+        """
+        if self._session is None:
+            self._connector = _acquire_connector(self.max_connections)
+            # Closing the session leaves the pool to _release_connector()
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                connector_owner=False
+            )
+        return self._session
+    
+    async def aclose(self):
+        """Close the HTTP session.
+        
+        The shared connection pool is closed too once no other translator
+        uses it.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            await _release_connector(self._connector)
+            self._connector = None
     
     async def _translate_single(
         self,
@@ -105,10 +449,50 @@ class OpenRouterTranslator(BaseTranslator):
         Returns:
             Translated text
         """
-        url = f"{self.base_url}/chat/completions"
+        return await self._request(session, self._build_prompt(text, self.custom_prompt))
+    
+    async def _request(
+        self,
+        session: aiohttp.ClientSession,
+        prompt: str
+    ) -> str:
+        """Send one prompt, retrying transient failures.
         
-        # Build prompt
-        prompt = self._build_prompt(text, self.custom_prompt)
+        Waits grow exponentially with full jitter. A Retry-After from a 429
+        is honoured on top, since it pauses the rate limiter that every
+        attempt goes through.
+        
+        Args:
+            session: aiohttp session
+            prompt: Prompt to send
+            
+        Returns:
+            Model output text
+        """
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type((RateLimitError, APIRequestError, TimeoutError)),
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_random_exponential(multiplier=1, max=self.max_backoff),
+            reraise=True
+        ):
+            with attempt:
+                return await self._send(session, prompt)
+    
+    async def _send(
+        self,
+        session: aiohttp.ClientSession,
+        prompt: str
+    ) -> str:
+        """Send one prompt to the chat completions endpoint.
+        
+        Args:
+            session: aiohttp session
+            prompt: Prompt to send
+            
+        Returns:
+            Model output text
+        """
+        url = f"{self.base_url}/chat/completions"
         
         # Prepare request
         headers = {
@@ -123,7 +507,9 @@ class OpenRouterTranslator(BaseTranslator):
             ]
         }
         
-        # Make request with retry logic handled by caller
+        await self.rate_limiter.acquire()
+        
+        # Make request (retried by _request)
         try:
             async with session.post(
                 url,
@@ -131,6 +517,8 @@ class OpenRouterTranslator(BaseTranslator):
                 headers=headers,
                 timeout=aiohttp.ClientTimeout(total=self.timeout)
             ) as response:
+                self._update_rate_limit(response)
+                
                 # Handle different status codes
                 if response.status == 401:
                     raise AuthenticationError("Invalid API key")
@@ -156,6 +544,50 @@ class OpenRouterTranslator(BaseTranslator):
         
         except asyncio.TimeoutError:
             raise TimeoutError(f"Request timed out after {self.timeout}s")
+        except aiohttp.ClientError as e:
+            raise APIRequestError(f"Connection error: {e}")
+    
+    def _update_rate_limit(self, response: aiohttp.ClientResponse):
+        """Pause requests if the response says the rate limit is used up.
+        
+        Honours Retry-After (seconds or HTTP date), and X-RateLimit-Reset
+        (epoch milliseconds, as OpenRouter sends it) once
+        X-RateLimit-Remaining reaches 0. A 429 without either pauses for
+        a default time.
+        
+        Args:
+            response: API response
+        """
+        headers = response.headers
+        pause = None
+        
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                pause = float(retry_after)
+            except ValueError:
+                try:
+                    pause = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    pass
+        
+        if pause is None and headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset = float(headers["X-RateLimit-Reset"])
+            except (KeyError, ValueError):
+                pass
+            else:
+                # Epoch milliseconds; accept epoch seconds too
+                if reset > 1e11:
+                    reset /= 1000
+                pause = reset - time.time()
+        
+        if pause is None and response.status == 429:
+            pause = _DEFAULT_RATE_LIMIT_PAUSE
+        
+        if pause is not None and pause > 0:
+            logger.warning("Rate limit reached, pausing requests for %.1fs", pause)
+            self.rate_limiter.pause(pause)
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information.
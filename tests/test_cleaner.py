@@ -0,0 +1,108 @@
+"""Tests for the text cleaner."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from modules.cleaner import TextCleaner
+
+
+class TestMayNeedRemoval(unittest.TestCase):
+    """The removal regex is skipped only for lines it cannot match."""
+
+    def test_plain_lines_are_skipped(self):
+        for line in ("Plain words only.", "Plain words only.\n", "Plain words only.\r\n"):
+            with self.subTest(line=line):
+                self.assertFalse(TextCleaner._may_need_removal(line))
+
+    def test_candidate_lines_are_kept(self):
+        lines = [
+            "See https://example.com\n",
+            "Mail someone@example.com\n",
+            "Cited [12]\n",
+            "Cited (4)\n",
+            "As in Figure 3\n",
+            "See Table 2\n",
+            "Per ref. 7\n",
+            "Control\x07 character\n",
+            "Non-ASCII café\n",
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertTrue(TextCleaner._may_need_removal(line))
+
+
+
+class _CountingPattern:
+    """Wrap a compiled pattern, counting sub() calls."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.calls = 0
+
+    def sub(self, repl, string):
+        self.calls += 1
+        return self.pattern.sub(repl, string)
+
+
+class TestCleanRemovalGate(unittest.TestCase):
+    """clean() only runs the removal regex on lines that may contain a match."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.tmp = Path(self.tmp_dir.name)
+
+    def _clean(self, lines, **kwargs):
+        input_path = self.tmp / "raw.txt"
+        input_path.write_text("".join(lines), encoding="utf-8")
+
+        cleaner = TextCleaner(output_path=str(self.tmp / "cleaned.txt"), **kwargs)
+        counter = _CountingPattern(cleaner.removal_pattern)
+        cleaner.removal_pattern = counter
+        cleaner.clean(str(input_path))
+
+        cleaned = (self.tmp / "cleaned.txt").read_text(encoding="utf-8")
+        return cleaned, counter.calls
+
+    def test_plain_lines_skip_regex(self):
+        plain = [f"Plain line number {i} with ordinary words.\n" for i in range(1000)]
+        special = [
+            "See https://example.com for details.\n",
+            "Mail someone@example.com today.\n",
+            "As shown in Figure 3, results vary [12].\n",
+            "Stray control\x07 character.\n",
+            "Non-ASCII line: café\n",
+            "Tab\tseparated\n",
+        ]
+
+        cleaned, calls = self._clean(plain + special)
+
+        self.assertEqual(calls, len(special))
+        self.assertIn("Plain line number 999 with ordinary words.", cleaned)
+        self.assertNotIn("https://", cleaned)
+        self.assertNotIn("@example.com", cleaned)
+        self.assertNotIn("[12]", cleaned)
+        self.assertNotIn("\x07", cleaned)
+
+    def test_gate_does_not_change_output(self):
+        lines = [
+            "Plain text line.\n",
+            "A reference (4) and ref. 7 here.\r\n",
+            "Visit http://example.org now\n",
+            "\n",
+            "Last line without newline",
+        ]
+
+        cleaned, _ = self._clean(lines)
+
+        cleaner = TextCleaner(output_path=str(self.tmp / "unused.txt"))
+        expected = [
+            " ".join(cleaner.removal_pattern.sub("", line).split())
+            for line in "".join(lines).splitlines()
+        ]
+        self.assertEqual(cleaned, "\n".join(line for line in expected if line))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,9 @@ from utils.config_loader import ConfigLoader
 from utils.logger import setup_logger, get_logger
 from utils.progress import ProgressBar
 from utils.state_manager import StateManager
+from utils.json_stream import JsonArrayWriter
+from utils.rate_limiter import AsyncRateLimiter
+from utils.translation_memory import TranslationMemory
 
 __all__ = [
     'ConfigLoader',
@@ -12,4 +15,7 @@ __all__ = [
     'get_logger',
     'ProgressBar',
     'StateManager',
+    'JsonArrayWriter',
+    'AsyncRateLimiter',
+    'TranslationMemory',
 ]
@@ -8,6 +8,23 @@ from dotenv import load_dotenv
 
 from utils.exceptions import ConfigFileNotFoundError, InvalidConfigError
 
+# libyaml's C loader when PyYAML was built with it; same results, much faster
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Env var -> (config path, type conversion) for overrides
+_ENV_MAPPINGS = {
+    'CHUNK_SIZE': (('pipeline', 'chunk_size'), int),
+    'BATCH_SIZE': (('pipeline', 'batch_size'), int),
+    'CONCURRENCY': (('pipeline', 'concurrency'), int),
+    'FLUSH_EVERY': (('pipeline', 'flush_every'), int),
+    'OPENROUTER_API_KEY': (('translation', 'api_key'), str),
+    'OPENROUTER_BASE_URL': (('translation', 'base_url'), str),
+    'MAX_COST_INR': (('cost', 'abort_threshold'), int),
+}
+
 
 class ConfigLoader:
     """Load configuration from YAML with env var overrides."""
@@ -39,7 +56,7 @@ class ConfigLoader:
         
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=_SafeLoader)
             
             if not isinstance(config, dict):
                 raise InvalidConfigError("Config must be a dictionary")
@@ -56,33 +73,16 @@ class ConfigLoader:
         # Load .env file if it exists
         load_dotenv()
         
-        # Map of env vars to config paths
-        env_mappings = {
-            'CHUNK_SIZE': ('pipeline', 'chunk_size'),
-            'BATCH_SIZE': ('pipeline', 'batch_size'),
-            'CONCURRENCY': ('pipeline', 'concurrency'),
-            'FLUSH_EVERY': ('pipeline', 'flush_every'),
-            'OPENROUTER_API_KEY': ('translation', 'api_key'),
-            'OPENROUTER_BASE_URL': ('translation', 'base_url'),
-            'MAX_COST_INR': ('cost', 'abort_threshold'),
-        }
-        
-        for env_var, config_path in env_mappings.items():
+        for env_var, (config_path, convert) in _ENV_MAPPINGS.items():
             value = os.getenv(env_var)
             if value is not None:
                 # Navigate to the nested config location
                 current = self.config
                 for key in config_path[:-1]:
-                    if key not in current:
-                        current[key] = {}
-                    current = current[key]
+                    current = current.setdefault(key, {})
                 
                 # Convert to appropriate type
-                final_key = config_path[-1]
-                if env_var in ['CHUNK_SIZE', 'BATCH_SIZE', 'CONCURRENCY', 'FLUSH_EVERY', 'MAX_COST_INR']:
-                    current[final_key] = int(value)
-                else:
-                    current[final_key] = value
+                current[config_path[-1]] = convert(value)
     
     def get(self, *keys: str, default: Any = None) -> Any:
         """Get nested config value.
@@ -0,0 +1,129 @@
+"""Output formats for translated datasets."""
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from utils.exceptions import InvalidConfigError
+
+# Optional: pyarrow is only needed for Parquet output
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+OUTPUT_FORMATS = ("csv", "json", "parquet")
+
+# Rows per Parquet row group, so readers can stream the file in pieces
+_PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+def resolve_output_formats(output_format: Any) -> Tuple[str, ...]:
+    """Validate the configured dataset output format(s).
+
+    Args:
+        output_format: A format name, "all", or a list of format names
+
+    Returns:
+        Tuple of format names to write
+
+    Raises:
+        InvalidConfigError: If a format is unknown or its dependency is missing
+    """
+    if output_format == "all":
+        formats = OUTPUT_FORMATS
+    elif isinstance(output_format, str):
+        formats = (output_format,)
+    else:
+        formats = tuple(output_format)
+
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        raise InvalidConfigError(
+            f"Invalid output format {output_format!r}, "
+            f"expected one or more of {OUTPUT_FORMATS} or 'all'"
+        )
+
+    # Fail before translating rather than when saving the results
+    if "parquet" in formats and pa is None:
+        raise InvalidConfigError("Parquet output requires pyarrow (pip install pyarrow)")
+
+    return formats
+
+
+def write_parquet_dataset(pairs: List[Dict[str, Any]], path: Path):
+    """Write translated pairs as a zstd-compressed Parquet file.
+
+    The columns match the CSV dataset. They are built explicitly rather than
+    with Table.from_pylist, which infers the schema from the first row only
+    and would drop metadata keys that only some pairs have.
+
+    Args:
+        pairs: Translated pairs, already sorted by chunk_id
+        path: Output Parquet path
+    """
+    table = pa.table({
+        "chunk_id": pa.array([pair["chunk_id"] for pair in pairs], type=pa.int64()),
+        "english": pa.array([pair["english"] for pair in pairs], type=pa.string()),
+        "hindi": pa.array([pair["hindi"] for pair in pairs], type=pa.string()),
+        "source_file": pa.array(
+            [pair["metadata"].get("source_file", "") for pair in pairs],
+            type=pa.string()
+        ),
+    })
+
+    pq.write_table(
+        table,
+        path,
+        compression="zstd",
+        use_dictionary=["source_file"],
+        row_group_size=_PARQUET_ROW_GROUP_SIZE
+    )
+
+
+def load_dataset(
+    output_formats: Tuple[str, ...],
+    csv_path: Path,
+    json_path: Path,
+    parquet_path: Path
+) -> Optional[List[Dict[str, Any]]]:
+    """Read back a saved dataset from the first configured format on disk.
+
+    JSON keeps the full pairs. CSV and Parquet only have the dataset
+    columns, so pairs read from them carry source_file as their only
+    metadata.
+
+    Args:
+        output_formats: Formats the dataset was saved in
+        csv_path: CSV dataset path
+        json_path: JSON dataset path
+        parquet_path: Parquet dataset path
+
+    Returns:
+        Translated pairs, or None if no saved dataset exists
+    """
+    if "json" in output_formats and json_path.exists():
+        with open(json_path, 'rb') as f:
+            return orjson.loads(f.read())
+
+    if "parquet" in output_formats and parquet_path.exists():
+        rows = pq.read_table(parquet_path).to_pylist()
+    elif "csv" in output_formats and csv_path.exists():
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = [{**row, "chunk_id": int(row["chunk_id"])} for row in csv.DictReader(f)]
+    else:
+        return None
+
+    return [
+        {
+            "chunk_id": row["chunk_id"],
+            "english": row["english"],
+            "hindi": row["hindi"],
+            "metadata": {"source_file": row["source_file"]}
+        }
+        for row in rows
+    ]
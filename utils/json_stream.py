@@ -0,0 +1,49 @@
+"""Incremental JSON array writing."""
+
+from typing import Any, BinaryIO
+
+import orjson
+
+
+class JsonArrayWriter:
+    """Write a JSON array to a binary file one element at a time.
+
+    Only the current element is ever serialized, so writing a dataset does
+    not require holding it in memory as a list.
+
+    Example:
+        with open(path, 'wb') as f, JsonArrayWriter(f) as writer:
+            for entry in entries:
+                writer.write(entry)
+    """
+
+    def __init__(self, f: BinaryIO, option: int = orjson.OPT_INDENT_2):
+        """Initialize array writer.
+
+        Args:
+            f: File opened in binary write mode
+            option: orjson option flags used for each element
+        """
+        self.f = f
+        self.option = option
+        self.count = 0
+
+    def write(self, item: Any):
+        """Serialize and append one element.
+
+        Args:
+            item: JSON-serializable element
+        """
+        if self.count:
+            self.f.write(b',\n')
+        self.f.write(orjson.dumps(item, option=self.option))
+        self.count += 1
+
+    def __enter__(self):
+        self.f.write(b'[\n')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Leave a failed write visibly truncated rather than closing the array
+        if exc_type is None:
+            self.f.write(b'\n]\n')
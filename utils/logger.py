@@ -1,6 +1,7 @@
 """Structured logging setup for NICO-Forge."""
 
 import logging
+import logging.handlers
 import sys
 from pathlib import Path
 from typing import Optional
@@ -52,10 +53,19 @@ def setup_logger(
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = log_path / f"pipeline_{timestamp}.log"
         
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(getattr(logging, file_level.upper()))
+        file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        
+        # Records reach the file in batches rather than one write each;
+        # errors flush at once, and logging's shutdown hook flushes the
+        # rest at exit
+        buffered_handler = logging.handlers.MemoryHandler(
+            capacity=1024,
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+        buffered_handler.setLevel(getattr(logging, file_level.upper()))
+        logger.addHandler(buffered_handler)
         
         logger.info(f"Logging to file: {log_file}")
     
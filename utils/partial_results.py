@@ -0,0 +1,61 @@
+"""Incremental saving of translated pairs for resume."""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+import orjson
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Buffer size for partial result appends (1 MB)
+_IO_BUFFER_SIZE = 1 << 20
+
+
+def append_partial_results(path: Path, pairs: Iterable[Dict[str, Any]]):
+    """Append translated pairs to a JSON Lines file, one pair per line.
+
+    Only new pairs are written, so a flush costs what was translated since
+    the last one. Record their chunk ids as completed after this returns.
+
+    Args:
+        path: Partial results file
+        pairs: Pairs translated since the last append
+    """
+    with open(path, 'ab', buffering=_IO_BUFFER_SIZE) as f:
+        f.writelines(orjson.dumps(pair, option=orjson.OPT_APPEND_NEWLINE) for pair in pairs)
+
+
+def load_partial_results(path: Path, completed_ids: Set[Any]) -> List[Dict[str, Any]]:
+    """Load the saved pairs of completed chunks from a partial results file.
+
+    Args:
+        path: Partial results file written by append_partial_results()
+        completed_ids: Chunk ids recorded as completed
+
+    Returns:
+        Pairs of those chunks (the last one saved, for a chunk saved twice)
+    """
+    if not path.exists():
+        return []
+
+    pairs = {}
+    line = b''
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                pair = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # A crash mid-write can leave the last line cut off
+                continue
+            if pair["chunk_id"] in completed_ids:
+                pairs[pair["chunk_id"]] = pair
+
+    # Terminate a cut-off last line so new records start on their own
+    if line and not line.endswith(b'\n'):
+        with open(path, 'ab') as f:
+            f.write(b'\n')
+
+    logger.info(f"Loaded {len(pairs)} translations from {path}")
+    return list(pairs.values())
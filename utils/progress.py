@@ -9,7 +9,7 @@ class ProgressBar:
     
     def __init__(
         self,
-        total: int,
+        total: Optional[int],
         desc: str,
         unit: str = "it",
         show_eta: bool = True
@@ -17,7 +17,7 @@ class ProgressBar:
         """Initialize progress bar.
         
         Args:
-            total: Total number of items
+            total: Total number of items (None if not known up front)
             desc: Description text
             unit: Unit name (e.g., 'file', 'chunk', 'batch')
             show_eta: Whether to show ETA
@@ -0,0 +1,121 @@
+"""Proactive rate limiting for async API requests."""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Token-bucket limiter for requests and tokens per minute.
+
+    Each bucket holds at most one minute's allowance and refills
+    continuously. acquire() waits until both buckets can cover a call, so
+    requests are spread out to the provider's limits up front instead of
+    being retried after rate-limit errors. A call larger than a whole
+    minute's allowance is let through once the bucket is full and leaves it
+    in debt, which later calls wait off.
+
+    Example:
+        limiter = AsyncRateLimiter(requests_per_minute=20, tokens_per_minute=40000)
+        await limiter.acquire(requests=5, tokens=1200)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """Initialize rate limiter.
+
+        Args:
+            requests_per_minute: Request limit (None = unlimited)
+            tokens_per_minute: Token limit (None = unlimited)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        # Buckets start full
+        self.available_requests = float(requests_per_minute or 0)
+        self.available_tokens = float(tokens_per_minute or 0)
+        self.last_refill = time.monotonic()
+        
+        # Set by pause(): no acquisitions before this time
+        self.paused_until = 0.0
+
+        # Waiters are served one at a time, in arrival order
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, requests: int = 1, tokens: int = 0):
+        """Wait until the given number of requests and tokens may be spent.
+
+        Args:
+            requests: Number of API requests about to be made
+            tokens: Estimated tokens those requests will use
+        """
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = max(
+                    self._wait_time(self.available_requests, requests, self.requests_per_minute),
+                    self._wait_time(self.available_tokens, tokens, self.tokens_per_minute),
+                    self.paused_until - time.monotonic()
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            if self.requests_per_minute:
+                self.available_requests -= requests
+            if self.tokens_per_minute:
+                self.available_tokens -= tokens
+
+    def pause(self, seconds: float):
+        """Hold back all acquisitions for the given number of seconds.
+        
+        For when the provider says its limit is used up (a 429, or a
+        Retry-After or rate-limit reset header) despite the buckets: the
+        buckets are emptied too, so calls resume at the configured rate
+        rather than in a burst.
+        
+        Args:
+            seconds: How long to wait before the next acquisition
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.available_requests = min(self.available_requests, 0.0)
+        self.available_tokens = min(self.available_tokens, 0.0)
+    
+    def _refill(self):
+        """Add the allowance accrued since the last refill (done lazily)."""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+
+        if self.requests_per_minute:
+            self.available_requests = min(
+                float(self.requests_per_minute),
+                self.available_requests + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute:
+            self.available_tokens = min(
+                float(self.tokens_per_minute),
+                self.available_tokens + elapsed * self.tokens_per_minute / 60
+            )
+
+    @staticmethod
+    def _wait_time(available: float, needed: float, per_minute: Optional[float]) -> float:
+        """Seconds until a bucket holds enough for a call.
+
+        Args:
+            available: Current bucket level
+            needed: Amount the call needs
+            per_minute: Bucket refill rate and capacity (None = unlimited)
+
+        Returns:
+            Seconds to wait (0 if the call can proceed now)
+        """
+        if not per_minute:
+            return 0.0
+
+        # Calls larger than the bucket only wait for it to fill up
+        deficit = min(needed, per_minute) - available
+        return deficit * 60 / per_minute if deficit > 0 else 0.0
@@ -1,13 +1,23 @@
 """State management for resume capability."""
 
-import json
+import os
+import threading
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
 from datetime import datetime
 
+import orjson
+
 
 class StateManager:
-    """Manage pipeline state for resume capability."""
+    """Manage pipeline state for resume capability.
+    
+    One instance may be shared by several threads: writes, and the read
+    that decides to compact an IDs file, hold a lock so they never
+    interleave. Each module's state has a single writer in the pipeline,
+    so the lock is normally uncontended.
+    """
     
     def __init__(self, state_dir: str = "outputs/.state"):
         """Initialize state manager.
@@ -17,6 +27,21 @@ class StateManager:
         """
         self.state_dir = Path(state_dir)
         self.state_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Reentrant: update_completed_ids saves state, and reading IDs may
+        # compact them
+        self._lock = threading.RLock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled; a copy sent to another process gets its
+        # own (a lock cannot guard files across processes anyway)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
     
     def save_state(
         self,
@@ -40,8 +65,16 @@ class StateManager:
             "data": data or {}
         }
         
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f, indent=2, ensure_ascii=False)
+        # Written to a temp file and renamed over the state file, so a crash
+        # mid-write leaves the previous state intact rather than a
+        # truncated file
+        tmp_file = state_file.with_suffix('.json.tmp')
+        with self._lock:
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, state_file)
     
     def load_state(self, module_name: str) -> Optional[Dict[str, Any]]:
         """Load module state.
@@ -51,17 +84,18 @@ class StateManager:
             
         Returns:
             State dictionary or None if not found
+            
+        Raises:
+            orjson.JSONDecodeError: If the state file is corrupt (state is
+                replaced atomically, so this is not an interrupted write)
         """
         state_file = self.state_dir / f"{module_name}.json"
         
         if not state_file.exists():
             return None
         
-        try:
-            with open(state_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return None
+        with open(state_file, 'rb') as f:
+            return orjson.loads(f.read())
     
     def is_completed(self, module_name: str) -> bool:
         """Check if module has completed.
@@ -78,17 +112,51 @@ class StateManager:
     def get_completed_ids(self, module_name: str, key: str = "completed_ids") -> Set[Any]:
         """Get set of completed item IDs.
         
+        IDs are read from the module's append-only IDs file (see
+        update_completed_ids), plus any stored in the state data by older
+        versions. The file is compacted when that would at least halve it.
+        
         Args:
             module_name: Name of the module
-            key: Key in state data containing ID list
+            key: Name of the ID list
             
         Returns:
             Set of completed IDs
         """
+        with self._lock:
+            return self._read_completed_ids(module_name, key)
+    
+    def _read_completed_ids(self, module_name: str, key: str) -> Set[Any]:
+        """Read (and maybe compact) completed IDs; see get_completed_ids."""
+        completed_ids = set()
+        
         state = self.load_state(module_name)
         if state and 'data' in state and key in state['data']:
-            return set(state['data'][key])
-        return set()
+            completed_ids.update(state['data'][key])
+        
+        ids_file = self._ids_file(module_name, key)
+        if ids_file.exists():
+            line_count = 0
+            with open(ids_file, 'rb') as f:
+                for line in f:
+                    # An unterminated last line was cut off by an interrupted
+                    # write; it may still parse, as a different (shorter) ID
+                    if not line.endswith(b'\n'):
+                        continue
+                    entry = orjson.loads(line)
+                    # A list is a [first, last] run left by compaction (a
+                    # list is unhashable, so it is never an ID itself)
+                    if isinstance(entry, list):
+                        completed_ids.update(range(entry[0], entry[1] + 1))
+                    else:
+                        completed_ids.add(entry)
+                    line_count += 1
+            
+            entries = self._compact_entries(completed_ids)
+            if line_count > 2 * len(entries):
+                self._write_ids_file(ids_file, entries)
+        
+        return completed_ids
     
     def update_completed_ids(
         self,
@@ -96,26 +164,133 @@ class StateManager:
         new_ids: Set[Any],
         key: str = "completed_ids"
     ):
-        """Update completed IDs in state.
+        """Record newly completed IDs.
+        
+        The IDs are appended to `{module}.{key}.jsonl`, one JSON value per
+        line, so an update costs the new IDs only rather than a rewrite of
+        every ID recorded so far.
         
         Args:
             module_name: Name of the module
             new_ids: Set of newly completed IDs
-            key: Key in state data to update
+            key: Name of the ID list
         """
-        state = self.load_state(module_name) or {
-            "module": module_name,
-            "status": "in_progress",
-            "data": {}
-        }
+        if not new_ids:
+            return
         
-        existing_ids = set(state.get('data', {}).get(key, []))
-        existing_ids.update(new_ids)
+        with self._lock:
+            self._append_completed_ids(module_name, new_ids, key)
+    
+    def _append_completed_ids(self, module_name: str, new_ids: Set[Any], key: str):
+        """Append IDs to the IDs file; see update_completed_ids."""
+        if self.load_state(module_name) is None:
+            self.save_state(module_name, "in_progress")
         
-        state['data'][key] = list(existing_ids)
-        state['timestamp'] = datetime.now().isoformat()
+        ids_file = self._ids_file(module_name, key)
+        with open(ids_file, 'a+b') as f:
+            self._drop_partial_line(f)
+            
+            f.write(b''.join(
+                orjson.dumps(completed_id, option=orjson.OPT_APPEND_NEWLINE)
+                for completed_id in new_ids
+            ))
+    
+    def compact_completed_ids(
+        self,
+        module_name: str,
+        key: str = "completed_ids",
+        completed_ids: Optional[Set[Any]] = None
+    ):
+        """Rewrite the IDs file with each ID once, and runs of consecutive
+        integer IDs as single [first, last] lines.
         
-        self.save_state(module_name, state['status'], state['data'])
+        Args:
+            module_name: Name of the module
+            key: Name of the ID list
+            completed_ids: The IDs, if already loaded
+        """
+        with self._lock:
+            if completed_ids is None:
+                completed_ids = self.get_completed_ids(module_name, key)
+            
+            self._write_ids_file(
+                self._ids_file(module_name, key),
+                self._compact_entries(completed_ids)
+            )
+    
+    @staticmethod
+    def _compact_entries(completed_ids: Iterable[Any]) -> List[Any]:
+        """Encode IDs for the IDs file, runs of consecutive integers as
+        [first, last] pairs.
+        
+        Chunk IDs are usually consecutive, so a finished module's IDs
+        collapse to a handful of lines.
+        
+        Args:
+            completed_ids: IDs to encode
+            
+        Returns:
+            IDs file entries
+        """
+        entries = [i for i in completed_ids if type(i) is not int]
+        int_ids = sorted(i for i in completed_ids if type(i) is int)
+        
+        # Consecutive integers share the same (value - position)
+        for _, run in groupby(enumerate(int_ids), key=lambda item: item[1] - item[0]):
+            run = [completed_id for _, completed_id in run]
+            entries.append([run[0], run[-1]] if len(run) > 1 else run[0])
+        
+        return entries
+    
+    @staticmethod
+    def _write_ids_file(ids_file: Path, entries: List[Any]):
+        """Replace an IDs file with the given entries.
+        
+        Args:
+            ids_file: IDs file path
+            entries: Entries from _compact_entries()
+        """
+        tmp_file = ids_file.with_suffix('.jsonl.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(b''.join(
+                orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+                for entry in entries
+            ))
+        tmp_file.replace(ids_file)
+    
+    @staticmethod
+    def _drop_partial_line(f):
+        """Truncate an unterminated last line left by an interrupted write.
+        
+        Terminating it instead could turn a cut-off ID into a valid,
+        different one.
+        
+        Args:
+            f: IDs file opened in 'a+b' mode
+        """
+        end = f.seek(0, 2)
+        if end == 0:
+            return
+        
+        f.seek(-1, 2)
+        if f.read(1) == b'\n':
+            return
+        
+        # Find the last complete line, reading backwards
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                pos += newline + 1
+                break
+        f.truncate(pos)
+    
+    def _ids_file(self, module_name: str, key: str) -> Path:
+        """Path of a module's append-only IDs file."""
+        return self.state_dir / f"{module_name}.{key}.jsonl"
     
     def clear_state(self, module_name: Optional[str] = None):
         """Clear state for module or all modules.
@@ -127,7 +302,14 @@ class StateManager:
             state_file = self.state_dir / f"{module_name}.json"
             if state_file.exists():
                 state_file.unlink()
+            for ids_file in self.state_dir.glob(f"{module_name}.*.jsonl"):
+                ids_file.unlink()
         else:
             # Clear all state files
             for state_file in self.state_dir.glob("*.json"):
                 state_file.unlink()
+            for ids_file in self.state_dir.glob("*.jsonl"):
+                ids_file.unlink()
+            # Left behind by writes interrupted before their rename
+            for tmp_file in self.state_dir.glob("*.tmp"):
+                tmp_file.unlink()
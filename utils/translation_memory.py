@@ -0,0 +1,91 @@
+"""Persistent translation memory."""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# Keys per SELECT, below SQLite's default limit on bound parameters
+_QUERY_BATCH_SIZE = 500
+
+
+class TranslationMemory:
+    """On-disk cache of translations, keyed by source text and context.
+
+    Backed by a single SQLite file (stdlib only). Repeated sentences and
+    re-runs over the same documents are then served without an API call.
+
+    Example:
+        memory = TranslationMemory("outputs/.state/translation_memory.sqlite")
+        key = memory.make_key(text, model, "en", "hi")
+        memory.put_many([(key, translation)])
+        memory.get_many([key])  # {key: translation}
+    """
+
+    def __init__(self, path: str):
+        """Initialize translation memory.
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path)
+        # WAL keeps commits cheap; lookups never wait on a writer
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key BLOB PRIMARY KEY, translation TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text: str, *context: str) -> bytes:
+        """Build the lookup key for a text.
+
+        Args:
+            text: Source text
+            *context: Anything else the translation depends on (model,
+                prompt, language codes)
+
+        Returns:
+            SHA256 digest truncated to 128 bits, as for chunk hashes
+        """
+        data = "\0".join((*context, text)).encode("utf-8")
+        return hashlib.sha256(data).digest()[:16]
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, str]:
+        """Look up translations.
+
+        Args:
+            keys: Keys from make_key()
+
+        Returns:
+            Mapping of the keys found to their translations
+        """
+        found = {}
+        for start in range(0, len(keys), _QUERY_BATCH_SIZE):
+            batch = keys[start:start + _QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._conn.execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                batch
+            ))
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, str]]):
+        """Store translations (replacing earlier ones for the same keys).
+
+        Args:
+            items: (key, translation) pairs
+        """
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO translations (key, translation) VALUES (?, ?)",
+            items
+        )
+        self._conn.commit()
+
+    def close(self):
+        """Close the database."""
+        self._conn.close()
@@ -2,28 +2,41 @@
 Quick validation script to show before/after comparison of cleaned data
 """
 
-import json
+import ijson
 
 print("="*80)
 print("BEFORE/AFTER COMPARISON - First 3 Entries")
 print("="*80)
 
-# Load original data
-with open('outputs/en_hi_dataset.json', 'r', encoding='utf-8') as f:
-    original = json.load(f)
+# Stream cleaned data: keep the first 3 entries, count the rest
+cleaned = []
+cleaned_count = 0
+with open('outputs/cleaned_dataset.json', 'rb') as f:
+    for entry in ijson.items(f, 'item', use_float=True):
+        if cleaned_count < 3:
+            cleaned.append(entry)
+        cleaned_count += 1
 
-# Load cleaned data
-with open('outputs/cleaned_dataset.json', 'r', encoding='utf-8') as f:
-    cleaned = json.load(f)
+# Stream original data: keep only the entries matching those 3, count all
+needed_ids = {entry.get('chunk_id') for entry in cleaned}
+originals_by_id = {}
+original_count = 0
+with open('outputs/en_hi_dataset.json', 'rb') as f:
+    for entry in ijson.items(f, 'item', use_float=True):
+        chunk_id = entry.get('chunk_id')
+        # First match wins, as with the previous linear search
+        if chunk_id in needed_ids and chunk_id not in originals_by_id:
+            originals_by_id[chunk_id] = entry
+        original_count += 1
 
 # Show first 3 entries
-for i in range(min(3, len(cleaned))):
+for i in range(len(cleaned)):
     print(f"\n{'─'*80}")
     print(f"ENTRY {i+1}")
     print(f"{'─'*80}")
     
     # Find matching original entry
-    orig_entry = next((e for e in original if e.get('chunk_id') == cleaned[i].get('chunk_id')), None)
+    orig_entry = originals_by_id.get(cleaned[i].get('chunk_id'))
     
     if orig_entry:
         print("\n🔴 ORIGINAL ENGLISH:")
@@ -41,7 +54,7 @@ for i in range(min(3, len(cleaned))):
 print(f"\n{'='*80}")
 print(f"SUMMARY")
 print(f"{'='*80}")
-print(f"Original entries: {len(original)}")
-print(f"Cleaned entries: {len(cleaned)}")
-print(f"Entries removed: {len(original) - len(cleaned)}")
+print(f"Original entries: {original_count}")
+print(f"Cleaned entries: {cleaned_count}")
+print(f"Entries removed: {original_count - cleaned_count}")
 print(f"{'='*80}\n")